@@ -0,0 +1,159 @@
+# Headless benchmarks for the pyguses rendering hot paths
+# Usage: python benchmarks/benchmark.py [--quick] [--repeat N] [--output results.json]
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pygame
+import numpy as np
+from pyguses import glyph, form
+from pyguses.util import load_config
+from pyguses.color import colorlist
+from pyguses.curses import Curses, Flicker, Animator
+
+# Grid sizes in cells and colour diversity levels (number of distinct palette entries used)
+grid_sizes = [(80, 25), (160, 50), (320, 120)]
+quick_grid_sizes = [(80, 25)]
+color_levels = [1, 16, len(colorlist)]
+quick_color_levels = [1, len(colorlist)]
+
+def measure(function, setup=None, repeat=5, number=1):
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        times.append((time.perf_counter() - start)/number)
+    return {'best' : min(times), 'mean' : float(np.mean(times)), 'median' : float(np.median(times)), 'repeat' : repeat, 'number' : number}
+
+def fill_random(curses, colors, seed=0):
+    rng = np.random.default_rng(seed)
+    shape = curses.window.shape
+    curses.window['glyph'] = rng.integers(0, curses.char_index.tile_count, shape)
+    curses.window['foreground'] = rng.integers(0, colors, shape)
+    curses.window['background'] = rng.integers(0, colors, shape)
+    curses.dirty[:] = True
+
+def get_curses(width, height):
+    cell_width = int(load_config()['DISPLAY']['width'])
+    cell_height = int(load_config()['DISPLAY']['height'])
+    pygame.display.set_mode((width*cell_width, height*cell_height))
+    return Curses(width*cell_width, height*cell_height, 'black')
+
+def run_grid(width, height, colors, repeat):
+    results = {}
+    curses = get_curses(width, height)
+
+    # Cold start: no tileset in memory and an empty disk cache
+    config = load_config()['CACHE']
+    cache_directory = config.get('directory', '')
+    temp_directory = tempfile.mkdtemp(prefix='pyguses-bench-')
+    def init_cold():
+        glyph.tilesets.clear()
+        glyph.fallback_glyphs.clear()
+        shutil.rmtree(temp_directory, ignore_errors=True)
+        config['directory'] = temp_directory
+    try:
+        results['init_cold'] = measure(lambda: Curses(curses.screen_width, curses.screen_height, 'black'), init_cold, repeat)
+    finally:
+        config['directory'] = cache_directory
+        shutil.rmtree(temp_directory, ignore_errors=True)
+    results['init_warm'] = measure(lambda: Curses(curses.screen_width, curses.screen_height, 'black'), None, repeat)
+    curses = Curses(curses.screen_width, curses.screen_height, 'black')
+
+    results['clear_window'] = measure(curses.clear_window, None, repeat, 10)
+    message = 'The goblin hits you for 3 damage. ' * 8
+    results['put_message'] = measure(lambda: curses.put_message(0, 0, message, 'red', 'black'), None, repeat, 10)
+    # Layout cache miss: the message is wrapped again
+    results['put_message_uncached'] = measure(lambda: curses.put_message(0, 0, message, 'red', 'black'), curses.text_layout.cache.clear, repeat)
+
+    def surface_cold():
+        fill_random(curses, colors)
+        curses.glyph_cache.clear()
+        curses.invalidate_window_surface()
+    def surface_warm():
+        curses.invalidate_window_surface()
+    def surface_one_cell():
+        curses.put_char(width//2, height//2, '@', colorlist[colors - 1], 'black')
+    results['get_window_surface_cold'] = measure(curses.get_window_surface, surface_cold, repeat)
+    results['get_window_surface_warm'] = measure(curses.get_window_surface, surface_warm, repeat)
+    results['get_window_surface_one_cell'] = measure(curses.get_window_surface, surface_one_cell, repeat)
+
+    # Per-cell blit path with the tinted glyph cache
+    curses.blit_threshold = curses.window.size
+    results['blit_window_surface_cold'] = measure(curses.get_window_surface, surface_cold, repeat)
+    results['blit_window_surface_warm'] = measure(curses.get_window_surface, surface_warm, repeat)
+    curses.blit_threshold = 64
+
+    section = curses.get_cell_section(0, 0, width//2, height//2)
+    results['get_cell_section'] = measure(lambda: curses.get_cell_section(0, 0, width//2, height//2), None, repeat, 10)
+    results['set_cell_section'] = measure(lambda: curses.set_cell_section(width//4, height//4, section), None, repeat, 10)
+
+    results['form_frame'] = measure(lambda: form.Frame(0, 0, width, height, curses, style=1), None, repeat, 10)
+    results['form_rect_outline'] = measure(lambda: form.Rect(0, 0, width, height, curses, is_filled=False), None, repeat, 10)
+    results['form_hline'] = measure(lambda: form.Hline(0, width - 1, height//2, curses), None, repeat, 10)
+
+    # Every cell of the top row flickering
+    flickers = [Flicker(curses, 1, 500) for _ in range(width)]
+    def flicker_update():
+        for x, flicker in enumerate(flickers):
+            flicker.update()
+            flicker.refresh(x, 0)
+    results['flicker_update'] = measure(flicker_update, None, repeat, 10)
+
+    animator = Animator(curses)
+    for x in range(width):
+        for y in range(height//4):
+            animator.add_flicker(x, y, 1, 500)
+    clock = [0.0]
+    animator.clock = lambda: clock[0]
+    def animator_setup():
+        clock[0] += 0.5
+    results['animator_update'] = measure(animator.update, animator_setup, repeat)
+    return results
+
+def get_metadata():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit' : commit, 'python' : platform.python_version(), 'pygame' : pygame.version.ver, 'numpy' : np.__version__,
+            'machine' : platform.machine(), 'platform' : platform.platform(), 'video_driver' : os.environ['SDL_VIDEODRIVER']}
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pyguses rendering hot paths.')
+    parser.add_argument('--quick', action='store_true', help='smallest grid and two colour levels only')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='write JSON results to this file instead of stdout')
+    args = parser.parse_args()
+
+    pygame.init()
+    results = []
+    for width, height in (quick_grid_sizes if args.quick else grid_sizes):
+        for colors in (quick_color_levels if args.quick else color_levels):
+            for name, timing in run_grid(width, height, colors, args.repeat).items():
+                timing.update({'name' : name, 'grid' : [width, height], 'colors' : colors})
+                results.append(timing)
+                print('{:<32} {:>4}x{:<4} {:>4} colors {:>10.3f} ms'.format(name, width, height, colors, timing['best']*1000), file=sys.stderr)
+
+    report = json.dumps({'metadata' : get_metadata(), 'results' : results}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+    else:
+        print(report)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+import sys
+import time
+import unicodedata
+import numpy as np
+from .stats import FrameStats
+
+# Text/ANSI backend: writes a cell grid to a terminal stream, only cells that changed since the last frame are sent
+# The grid's dirty flags are left to the pygame window, cells are compared with what the terminal shows
+# A wide character takes two terminal columns and covers the next cell, which is not shown while it stays covered
+class AnsiRenderer():
+
+    def __init__(self, grid, stream=None, color=True):
+        self.grid = grid
+        self.stream = sys.stdout if stream is None else stream
+        self.color = color
+        self.initialization()
+
+    def initialization(self):
+        # Cells currently shown on the terminal, covered cells hold no glyph
+        self.shown = np.empty_like(self.grid.window)
+        self.palette_version = None
+        self.chars = []
+        self.wide = np.zeros(0, dtype=bool)
+        self.bytes_written = 0
+        # Own frame statistics, the grid may also be drawn by a pygame window
+        self.stats = FrameStats()
+        self.invalidate()
+
+    # Force a full redraw on the next render, e.g. for a newly attached terminal
+    def invalidate(self):
+        self.shown['glyph'] = np.iinfo(np.uint16).max
+
+    # Printable character of every glyph index, wide characters take two terminal columns
+    def load_chars(self):
+        chars = self.grid.char_index.chars
+        if len(chars) == len(self.chars):
+            return
+        count = len(self.chars)
+        for char in chars[count:]:
+            self.chars.append(char if char and char.isprintable() else ' ')
+        wide = [unicodedata.east_asian_width(char[0]) in 'WF' for char in self.chars[count:]]
+        self.wide = np.concatenate([self.wide, np.array(wide, dtype=bool)])
+
+    # Cells covered by the right half of a wide character, a wide character on a covered cell is not shown
+    def get_covered(self, window):
+        wide = self.wide[window['glyph']]
+        # Nothing to cover right of the last column
+        wide[:, -1] = False
+        covered = np.zeros_like(wide)
+        covered[:, 1:] = wide[:, :-1]
+        # Adjacent wide characters are resolved left to right
+        for y in np.flatnonzero((wide[:, :-1] & wide[:, 1:]).any(axis=1)):
+            covered[y] = False
+            for x in np.flatnonzero(wide[y]).tolist():
+                if not covered[y, x]:
+                    covered[y, x + 1] = True
+        return covered
+
+    # SGR parameters per palette index, transparent colors use the terminal default
+    def load_palette(self):
+        table = self.grid.palette.table
+        self.foregrounds = ['39' if a == 0 else '38;2;{};{};{}'.format(r, g, b) for r, g, b, a in table.tolist()]
+        self.backgrounds = ['49' if a == 0 else '48;2;{};{};{}'.format(r, g, b) for r, g, b, a in table.tolist()]
+
+    # Escape sequences updating the terminal to the current grid
+    def get_frame(self):
+        if self.color and self.grid.palette.version != self.palette_version:
+            self.palette_version = self.grid.palette.version
+            self.load_palette()
+            self.invalidate()
+        self.load_chars()
+
+        window = self.grid.get_frame()
+        if self.shown.shape != window.shape:
+            # The grid was resized
+            self.shown = np.empty_like(window)
+            self.invalidate()
+        # Covered cells are never sent, an uncovered cell was overwritten by the wide character and is sent again
+        covered = self.get_covered(window)
+        dirty = (window != self.shown) & ~covered
+        if not dirty.any():
+            self.shown['glyph'][covered] = np.iinfo(np.uint16).max
+            return ''
+
+        out = []
+        colors = None
+        position = None
+        for y in np.flatnonzero(dirty.any(axis=1)):
+            cols = np.flatnonzero(dirty[y])
+            for x, (glyph, foreground, background) in zip(cols.tolist(), window[y, cols].tolist()):
+                # The cursor is only placed when the previous character did not leave it there
+                if position != (y, x):
+                    out.append('\x1b[{};{}H'.format(y + 1, x + 1))
+                if self.color and (foreground, background) != colors:
+                    colors = (foreground, background)
+                    out.append('\x1b[0;{};{}m'.format(self.foregrounds[foreground], self.backgrounds[background]))
+                out.append(self.chars[glyph])
+                position = (y, x + 1 + int(self.wide[glyph]))
+        if colors is not None:
+            out.append('\x1b[0m')
+
+        self.shown[dirty] = window[dirty]
+        self.shown['glyph'][covered] = np.iinfo(np.uint16).max
+        self.stats.cells_redrawn += int(np.count_nonzero(dirty))
+        return ''.join(out)
+
+    # Write the changed cells to the stream, returns the number of characters written
+    def render(self):
+        start = time.perf_counter()
+        frame = self.get_frame()
+        if frame:
+            self.stream.write(frame)
+            self.stream.flush()
+            self.bytes_written += len(frame)
+        self.stats.blit_time += time.perf_counter() - start
+        self.stats.end_frame()
+        return len(frame)
+
+    # Plain text rows of the grid, for screen assertions
+    def get_lines(self):
+        self.load_chars()
+        return [''.join(self.chars[glyph] for glyph in row) for row in self.grid.get_frame()['glyph'].tolist()]
+
+    def get_text(self):
+        return '\n'.join(self.get_lines())
@@ -1,4 +1,5 @@
 import pygame
+import numpy as np
 # A mapping of strings to color objects.
 #http://www.rapidtables.com/web/color/html-color-codes.htm
 
@@ -155,5 +156,55 @@ colornames = {# Red
               # Transparent
               'transparent':            pygame.Color(255,   0, 255,   0)}
 
+# Color name to palette index mapping (cells store these indices)
+colorlist = list(colornames.keys())
+colorindex = {name : i for i, name in enumerate(colorlist)}
+
+# Default RGBA table, one row per palette index
+colortable = np.array([tuple(colornames[name]) for name in colorlist], dtype=np.uint8)
+
+# Indexed palette of a window: swapping or fading colors is a table update
+class Palette():
+    def __init__(self, table=colortable):
+        self.base = np.array(table, dtype=np.uint8)
+        self.initialization()
+    
+    def initialization(self):
+        self.table = self.base.copy()
+        self.version = 0
+    
+    def get_index(self, color):
+        return colorindex[color] if isinstance(color, str) else int(color)
+    
+    def get_color(self, color):
+        return tuple(int(c) for c in self.table[self.get_index(color)])
+    
+    def set_color(self, color, rgba):
+        self.table[self.get_index(color)] = tuple(pygame.Color(*rgba) if not isinstance(rgba, str) else colornames[rgba])
+        self.version += 1
+    
+    # Replace the whole table, e.g. a theme
+    def set_table(self, table):
+        self.table[:] = table
+        self.version += 1
+    
+    # Blend every color of the base table toward rgba, amount 0 is the base table and 1 is flat rgba
+    def fade(self, rgba, amount):
+        rgba = np.array(tuple(colornames[rgba]) if isinstance(rgba, str) else tuple(rgba), dtype=float)
+        table = self.base*(1 - amount)
+        table[:, :3] += rgba[:3]*amount
+        # Alpha is kept so transparent cells stay transparent
+        table[:, 3] = self.base[:, 3]
+        self.set_table(np.rint(table).astype(np.uint8))
+    
+    # Scale the base brightness, e.g. night mode
+    def dim(self, factor):
+        table = self.base.astype(float)
+        table[:, :3] *= factor
+        self.set_table(np.clip(np.rint(table), 0, 255).astype(np.uint8))
+    
+    def reset(self):
+        self.set_table(self.base)
+
 #colornames = pygame.colordict.THECOLORS.copy()
 #colornames.update({'trans': (0, 0, 0, 0)})
\ No newline at end of file
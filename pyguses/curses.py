@@ -2,13 +2,16 @@
 # http://www.tedmontgomery.com/tutorial/altchrc-a.html
 
 import os
-import configparser
+import time
 import pygame
 import numpy as np
-from .color import colornames
-from .util import check_divisibility
+from .color import colornames, colorindex
+from .util import check_divisibility, load_config
+from .render import AtlasRenderer
+from .glyph import GlyphCache, get_fallback_glyphs, get_tileset, get_glyph_image
+from .grid import CellGrid, cell_dtype
 
-class Curses():
+class Curses(CellGrid):
     
     def __init__(self, screen_width, screen_height, color):
         self.screen_width = screen_width
@@ -19,8 +22,7 @@ class Curses():
     # Initialization
     def initializaton(self):
         # Game config settings
-        config = configparser.ConfigParser()
-        config.read(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.ini'))
+        config = load_config()
         
         self.cell_width = int(config['DISPLAY']['width'])
         self.cell_height = int(config['DISPLAY']['height'])
@@ -29,211 +31,287 @@ class Curses():
         original_height = int(config['ASSETS']['height'])
         path = os.path.join(os.path.dirname(os.path.abspath(__file__)), config['ASSETS']['path'])
         
-        # Generate curses image array
-        self.image_array = self.get_image_array(original_width, original_height, path)
-        self.default_background = self.image_array[0, 0].get_at((0, 0))
-        self.default_foreground = self.image_array[-3, -5].get_at((0, 0))
+        # Load shared tileset
+        self.tileset = get_tileset(path, original_width, original_height)
+        self.default_background = pygame.Color(*self.tileset.background)
+        self.default_foreground = pygame.Color(*self.tileset.foreground)
         
-        # Generate empty curses window
-        self.win_width = check_divisibility(self.cell_width, self.screen_width)
-        self.win_height = check_divisibility(self.cell_height, self.screen_height)
-        self.clear_window()
+        # Generate empty curses window, statistics and palette
+        super(Curses, self).__init__(check_divisibility(self.cell_width, self.screen_width), check_divisibility(self.cell_height, self.screen_height))
+        self.palette_version = self.palette.version
         
-        # Generate character array
-        self.char_array = self.get_char_array()
+        # Frame statistics are optionally drawn as an overlay
+        self.stats_overlay = None
+        self.fallback_glyphs = get_fallback_glyphs(self.cell_width, self.cell_height)
         
-        # Generate color dictionary
-        self.colored_char_dict={}
+        # Generate tinted glyph cache
+        self.glyph_cache = GlyphCache(int(config['CACHE']['capacity']))
         
+        # Optional per-cell light multiplier applied to fg/bg during composition
+        self.light = None
+        self.surface_light = None
+        
+        # Generate background and persistent window surfaces
+        self.load_surfaces()
+        
+        # Generate vectorized renderer, used when more cells than blit_threshold are dirty
+        self.renderer = AtlasRenderer(self)
+        self.blit_threshold = 64
+    
+    def load_surfaces(self):
         # Generate background surface
         self.background = pygame.Surface((self.screen_width, self.screen_height)).convert_alpha() 
         self.background.fill(colornames[self.color])
         self.foreground = pygame.Surface([self.screen_width, self.screen_height], pygame.SRCALPHA, 32).convert_alpha()        
+        
+        # Generate persistent window surface and the cells it currently shows
+        self.window_surface = pygame.Surface((int(self.cell_width*self.win_width), int(self.cell_height*self.win_height)), pygame.SRCALPHA, 32).convert_alpha()
+        self.surface_cells = np.empty_like(self.window)
+        self.scrolled_rects = []
+        self.invalidate_window_surface()
     
-    # Clear window
-    def clear_window(self):
-        self.window = np.empty([self.win_height, self.win_width], dtype=dict)
-        for i in range(self.win_height):
-            for j in range(self.win_width):
-                self.put_char(j, i)
+    # Change the cell size and screen size at runtime, the cells that still fit are kept
+    def resize(self, cell_width, cell_height, screen_width, screen_height):
+        # Both sizes are checked before anything changes
+        win_width = check_divisibility(cell_width, screen_width)
+        win_height = check_divisibility(cell_height, screen_height)
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.resize_grid(win_width, win_height)
+        
+        if self.light is not None:
+            light = np.ones([self.win_height, self.win_width], dtype=np.float32)
+            height, width = min(light.shape[0], self.light.shape[0]), min(light.shape[1], self.light.shape[1])
+            light[:height, :width] = self.light[:height, :width]
+            self.light = light
+            self.surface_light = np.ones_like(light)
+        
+        # Tinted glyphs are rebuilt lazily at the new size, the atlas is scaled from the unscaled tileset masks
+        self.glyph_cache.clear()
+        self.fallback_glyphs = get_fallback_glyphs(cell_width, cell_height)
+        self.load_surfaces()
+        self.renderer.initialization()
     
     # Load curses images
     def get_image_array(self, width, height, path):
-        surface = pygame.image.load(path).convert_alpha()
-        width_count = check_divisibility(width, surface.get_width())
-        height_count = check_divisibility(height, surface.get_height())
-        
-        image_array = np.empty([height_count, width_count], dtype=pygame.Surface)
-        for i in range(height_count):
-            for j in range(width_count):
-                image_array[i ,j] = surface.subsurface(j*width, i*height, width, height).convert_alpha() 
-                image_array[i ,j] = pygame.transform.scale(image_array[i ,j], (self.cell_width, self.cell_height))
+        tileset = get_tileset(path, width, height)
+        image_array = np.empty(self.char_array.shape, dtype=pygame.Surface)
+        for glyph in range(image_array.size):
+            image_array.flat[glyph] = tileset.get_image(glyph, self.cell_width, self.cell_height)
         return image_array
     
-    def put_char(self, x, y, char=' ', foreground='white', background='transparent'):
-            self.window[y, x] = {'char' : char, 'foreground' : foreground, 'background' : background}
+    def get_window_surface(self):
+        self.update_window_surface()
+        return self.window_surface
+    
+    # Render the whole window straight onto a target surface (e.g. the display) in one pass
+    def draw_window(self, surface, x=0, y=0):
+        start = time.perf_counter()
+        if not surface.get_flags() & pygame.SRCALPHA:
+            # Transparent cells show the background color, as when blitting the background and the window surface
+            rect = pygame.Rect(0, 0, self.win_width*self.cell_width, self.win_height*self.cell_height)
+            surface.blit(self.background, (x*self.cell_width, y*self.cell_height), rect)
+        self.renderer.draw(surface, self.get_frame(), x, y, self.light)
+        if self.stats_overlay is not None:
+            self.draw_stats_overlay(surface, x, y)
+        self.stats.blit_time += time.perf_counter() - start
+        self.stats.cells_redrawn += self.window.size
+        self.stats.end_frame(self.glyph_cache)
+    
+    # Force a full redraw on the next update
+    def invalidate_window_surface(self):
+        self.surface_cells['glyph'] = np.iinfo(np.uint16).max
+        self.dirty[:] = True
+    
+    # Light map: 0 is black, 1 is the palette color, values above 1 brighten
+    def enable_light(self, level=1.0):
+        self.light = np.full([self.win_height, self.win_width], level, dtype=np.float32)
+        self.surface_light = np.ones_like(self.light)
+        self.invalidate_window_surface()
     
-    def put_message(self, x, y , message, foreground='white', background='transparent', auto=True, align='left', box_x=0, box_y=0, box_width=None, box_height=None):
-        if box_width == None:
-            box_width = self.win_width
-        if box_height == None:
-            box_height = self.win_height
+    def disable_light(self):
+        self.light = None
+        self.surface_light = None
+        self.invalidate_window_surface()
+    
+    def set_light(self, light):
+        if self.light is None:
+            self.enable_light()
+        self.light[:] = light
+    
+    # Redraw damaged cells on the persistent window surface, returns dirty rects for pygame.display.update
+    def update_window_surface(self):
+        rects = self.redraw_dirty_cells()
+        if self.stats_overlay is not None:
+            box = self.draw_stats_overlay(self.window_surface)
+            if box is not None:
+                # The overlay covers the pixels of these cells, they are redrawn from the grid on the next update
+                self.surface_cells[box]['glyph'] = np.iinfo(np.uint16).max
+                self.dirty[box] = True
+                rects.append(pygame.Rect(box[1].start*self.cell_width, box[0].start*self.cell_height,
+                                         (box[1].stop - box[1].start)*self.cell_width, (box[0].stop - box[0].start)*self.cell_height))
+        self.stats.end_frame(self.glyph_cache)
+        return rects
+    
+    def redraw_dirty_cells(self):
+        # Palette swaps recolor every cell, tinted glyphs are rebuilt lazily
+        if self.palette.version != self.palette_version:
+            self.palette_version = self.palette.version
+            self.glyph_cache.clear()
+            self.invalidate_window_surface()
         
-        char_list = self.get_char_list(message)
-        # Set alignment
-        if align == 'left':
-            cur_x = x
-        elif align == 'mid':
-            cur_x = x - int(len(char_list)/2)
-        elif align == 'right':
-            cur_x = x - len(char_list) + 1
-            
-        # check initial cursor position
-        cur_y = y
-        if cur_x < box_x:
-            cur_y -= int(np.ceil( (box_x - cur_x) / box_width))
-            cur_x = box_x + box_width - (box_x - cur_x) % box_width
+        # Skip cells rewritten with the content already on the surface
+        window = self.get_frame()
+        dirty = self.dirty & (window != self.surface_cells)
+        if self.light is not None:
+            dirty |= self.light != self.surface_light
+        self.dirty[:] = False
+        rects = self.scrolled_rects
+        self.scrolled_rects = []
+        count = int(np.count_nonzero(dirty))
+        if count == 0:
+            return rects
         
-        if cur_y < box_y:
-            char_list = char_list[(box_y - cur_y ) * box_width - (cur_x - box_x):]
-            cur_x = box_x
-            cur_y = box_y
-            
-        ind = 0
-        x_ = 0
-        while ind < len(char_list):
-            if auto :
-                if cur_x + x_ < box_width + box_x:
-                    self.put_char(cur_x + x_, cur_y, char_list[ind], foreground, background)
-                else:
-                    x_ -= box_width
-                    cur_y += 1
-                    if cur_y < box_height + box_y:
-                        self.put_char(cur_x + x_, cur_y, char_list[ind], foreground, background)
-                    else:
-                        break
+        start = time.perf_counter()
+        tint_time = self.stats.tint_time
+        if count > self.blit_threshold or self.light is not None:
+            # Compose the bounding box of the damage in one pass, lit cells never go through the glyph cache
+            rows = np.flatnonzero(dirty.any(axis=1))
+            cols = np.flatnonzero(dirty.any(axis=0))
+            box = (slice(rows[0], rows[-1] + 1), slice(cols[0], cols[-1] + 1))
+            if self.light is None:
+                self.renderer.draw(self.window_surface, window[box], int(cols[0]), int(rows[0]))
             else:
-                if cur_x + x_ < box_width + box_x and cur_y < box_height + box_y - 1:
-                    self.put_char(cur_x + x_, cur_y, char_list[ind], foreground, background)
-            x_ += 1
-            ind += 1
+                self.renderer.draw(self.window_surface, window[box], int(cols[0]), int(rows[0]), self.light[box])
+                self.surface_light[box] = self.light[box]
+            self.surface_cells[box] = window[box]
+            self.stats.cells_redrawn += window[box].size
+        else:
+            for i, j in np.argwhere(dirty):
+                rect = pygame.Rect(int(j*self.cell_width), int(i*self.cell_height), self.cell_width, self.cell_height)
+                self.window_surface.fill((0, 0, 0, 0), rect)
+                self.window_surface.blit(self.get_cell_surface(j, i, window), rect)
+            self.surface_cells[dirty] = window[dirty]
+            self.stats.cells_redrawn += count
+        # Tinting on glyph cache misses is timed separately
+        self.stats.blit_time += time.perf_counter() - start - (self.stats.tint_time - tint_time)
+        return rects + self.get_dirty_rects(dirty)
     
-    def get_cell(self, x, y):
-        return self.window[y, x]
+    # Shift a block of cells by (dx, dy) together with its rendered pixels, the exposed strip is left for the caller to fill
+    def scroll_section(self, x, y, width, height, dx, dy):
+        box = (slice(y, y + height), slice(x, x + width))
+        if abs(dx) >= width or abs(dy) >= height:
+            self.dirty[box] = True
+            return
+        
+        src = (slice(max(-dy, 0), height - max(dy, 0)), slice(max(-dx, 0), width - max(dx, 0)))
+        dst = (slice(max(dy, 0), height - max(-dy, 0)), slice(max(dx, 0), width - max(-dx, 0)))
+        for cells in (self.window[box], self.surface_cells[box], self.dirty[box]):
+            cells[dst] = cells[src].copy()
+        if self.surface_light is not None:
+            self.surface_light[box][dst] = self.surface_light[box][src].copy()
+        if self.layers is not None:
+            # Panels stay in place, the scrolled block is recomposed from the window
+            self.layers.damage[box] = True
+        
+        rect = pygame.Rect(x*self.cell_width, y*self.cell_height, width*self.cell_width, height*self.cell_height)
+        self.window_surface.set_clip(rect)
+        self.window_surface.scroll(dx*self.cell_width, dy*self.cell_height)
+        self.window_surface.set_clip(None)
+        self.scrolled_rects.append(rect)
+        
+        # Pixels in the exposed strip are stale
+        exposed = np.ones([height, width], dtype=bool)
+        exposed[dst] = False
+        self.surface_cells[box]['glyph'][exposed] = np.iinfo(np.uint16).max
+        self.dirty[box][exposed] = True
     
-    def set_cell(self, x, y, cell):
-        self.window[y, x] = cell    
+    # Draw the last frame statistics over a corner of the window on every update, the grid is left untouched
+    def show_stats(self, x=0, y=0, foreground='yellow', background='black'):
+        self.stats_overlay = (x, y, foreground, background)
     
-    def get_window_surface(self):
-        surface = pygame.Surface((int(self.cell_width*self.window.shape[1]), int(self.cell_height*self.window.shape[0])), pygame.SRCALPHA, 32).convert_alpha()
-        for i in range(self.window.shape[0]):
-            for j in range(self.window.shape[1]):
-                subsurface = self.get_cell_surface(j, i)
-                surface.blit(subsurface, (int(j*self.cell_width), int(i*self.cell_height)))        
-        return surface
-    
-    def get_cell_surface(self, x, y):
-        char = self.window[y, x]['char']
-        foreground = self.window[y, x]['foreground']
-        background = self.window[y, x]['background']        
-        key = char+'-'+foreground+'-'+background
+    def hide_stats(self):
+        self.stats_overlay = None
+    
+    # Draw the overlay onto a surface showing the window at cell (left, top), returns the covered cell box
+    def draw_stats_overlay(self, surface, left=0, top=0):
+        frame = self.stats.get_stats()
+        if frame is None:
+            return None
+        x, y, foreground, background = self.stats_overlay
+        lines = ['frame {:>6} {:>7.2f}ms'.format(frame['frame'], frame['frame_time']*1000),
+                 'cells {:>6}w {:>6}r'.format(frame['cells_written'], frame['cells_redrawn']),
+                 'cache {:>4}h {:>4}m {:>4}e'.format(frame.get('cache_hits', 0), frame.get('cache_misses', 0), frame.get('cache_evictions', 0)),
+                 'tint {:>5.2f} blit {:>5.2f}ms'.format(frame['tint_time']*1000, frame['blit_time']*1000),
+                 'surfaces {:>4}'.format(frame['surface_allocations'])]
+        width = max(len(line) for line in lines)
+        cells = np.empty([len(lines), width], dtype=cell_dtype)
+        cells['glyph'] = [self.char_index.get_glyphs(line.ljust(width)) for line in lines]
+        cells['foreground'] = colorindex[foreground]
+        cells['background'] = colorindex[background]
         
-        if key in self.colored_char_dict.keys():
-            colored_image = self.colored_char_dict[key]
-        else:
-            original_image = self.get_image_by_char(char)            
-            colored_image = self.get_colored_image(original_image, foreground, background)
-            self.colored_char_dict[key] = colored_image
+        # Clipped to the window
+        box = (slice(y, min(y + len(lines), self.win_height)), slice(x, min(x + width, self.win_width)))
+        if box[0].stop <= y or box[1].stop <= x:
+            return None
+        self.renderer.draw(surface, cells[:box[0].stop - y, :box[1].stop - x], left + x, top + y)
+        return box
+    
+    # Merge horizontal runs of dirty cells into rects
+    def get_dirty_rects(self, dirty):
+        rects = []
+        for i in np.flatnonzero(dirty.any(axis=1)):
+            cols = np.flatnonzero(dirty[i])
+            for run in np.split(cols, np.flatnonzero(np.diff(cols) != 1) + 1):
+                rects.append(pygame.Rect(int(run[0]*self.cell_width), int(i*self.cell_height), int(len(run)*self.cell_width), self.cell_height))
+        return rects
+    
+    def get_cell_surface(self, x, y, window=None):
+        window = self.window if window is None else window
+        key = tuple(window[y, x].tolist())
+        colored_image = self.glyph_cache.get(key)
+        if colored_image is None:
+            colored_image = self.get_tinted_glyph(*key)
+            self.glyph_cache.put(key, colored_image)
+        return colored_image
+    
+    def get_tinted_glyph(self, glyph, foreground, background):
+        # Tinting is a palette table lookup over the glyph mask
+        start = time.perf_counter()
+        self.renderer.load_glyphs()
+        colored_image = get_glyph_image(self.renderer.atlas[glyph], self.palette.table[foreground], self.palette.table[background])
+        self.stats.surface_allocations += 1
+        self.stats.tint_time += time.perf_counter() - start
         return colored_image
+    
+    # Tint glyphs ahead of time, colour_pairs are (foreground, background) names
+    def prewarm(self, chars, colour_pairs):
+        for char in chars:
+            for foreground, background in colour_pairs:
+                key = self.get_cell_record(char, foreground, background)
+                if key not in self.glyph_cache:
+                    self.glyph_cache.put(key, self.get_tinted_glyph(*key))
             
+    # Tint a glyph image drawn in the default colors with palette colors
     def get_colored_image(self, image, foreground, background):
-        surface = image.copy()
-        pixel_array = pygame.PixelArray(surface)
-        if colornames[foreground] != self.default_background:
-            pixel_array.replace(self.default_foreground, colornames[foreground])
-            pixel_array.replace(self.default_background, colornames[background]) 
-        else:
-            pixel_array.replace(self.default_background, colornames[background])
-            pixel_array.replace(self.default_foreground, colornames[foreground])               
-        surface = pixel_array.surface
-        return surface
+        mask = np.all(pygame.surfarray.array3d(image) == tuple(self.default_foreground)[:3], axis=2)
+        self.stats.surface_allocations += 1
+        return get_glyph_image(mask, self.palette.get_color(foreground), self.palette.get_color(background))
         
     def get_image_by_char(self, char):
         # Check unique characters
-        ind = np.argwhere(self.char_array == char)
-        if len(ind) != 0:
-            original_image = self.image_array[ind[0][0], ind[0][1]]        
+        position = self.char_index.get_position(char)
+        if position is not None:
+            original_image = self.tileset.get_image(self.char_index.get_glyph(char), self.cell_width, self.cell_height)
         else:
-            # No maching character -> generate surface from font
-            original_image = pygame.font.Font(None, 50).render(char, 0, self.default_foreground, self.default_background).convert_alpha() 
-            original_image = pygame.transform.scale(original_image, (self.cell_width, self.cell_height))
+            # No maching character -> glyph rendered once from the shared fallback font
+            original_image = self.fallback_glyphs.get_image(self.char_index.get_glyph(char), self.default_foreground, self.default_background)
+            self.stats.surface_allocations += 1
             
         return original_image
-    
-    def get_char_array(self):
-        # Character to image mapping
-        char_list_0 = ['', '☺', '☻', '♥', '♦', '♣', '♠', '●', '◘', '○', '◙', '♂', '♀', '♪', '♫', '☼']
-        char_list_1 = ['▶', '◀', '↕', '‼', '¶', '§', '▬', '↨', '↑', '↓', '→', '←', '∟', '↔', '▲', '▼']
-        char_list_2 = [' ', '!', '"', '#', '$', '%', '&', '\'', '(', ')', '*', '+', ',', '-', '.', '/']
-        char_list_3 = ['0', '1', '2', '3', '4', '5', '6', '7', '8', '9', ':', ';', '<', '=', '>', '?']
-        char_list_4 = ['@', 'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', 'O']
-        char_list_5 = ['P', 'Q', 'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y', 'Z', '[', '\\', ']', '^', '_']
-        char_list_6 = ['`', 'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm', 'n', 'o']
-        char_list_7 = ['p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z', '{', '¦', '}', '~', '⌂']
-        char_list_8 = ['Ç', 'ü', 'é', 'â', 'ä', 'à', 'å', 'ç', 'ê', 'ë', 'è', 'ï', 'î', 'ì', 'Ä', 'Å']
-        char_list_9 = ['É', 'æ', 'Æ', 'ô', 'ö', 'ò', 'û', 'ù', 'ÿ', 'Ö', 'Ü', '¢', '£', '¥', '₧', 'ƒ']
-        char_list_10 = ['á', 'í', 'ó', 'ú', 'ñ', 'Ñ', 'ª', 'º', '¿', '⌐', '¬', '½', '¼', '¡', '«', '»']
-        char_list_11 = ['░', '▒', '▓', '│', '┤', '╡', '╢', '╖', '╕', '╣', '║', '╗', '╝', '╜', '╛', '┐']
-        char_list_12 = ['└', '┴', '┬', '├', '─', '┼', '╞', '╟', '╚', '╔', '╩', '╦', '╠', '═', '╬', '╧']
-        char_list_13 = ['╨', '╤', '╥', '╙', '╘', '╒', '╓', '╪', '╫', '┘', '┌', '█', '▄', '▌', '▐', '▀']
-        char_list_14 = ['α', 'β', 'Γ', 'Π', 'Σ', 'σ', 'μ', 'τ', 'Φ', 'Θ', 'Ω', 'δ', '∞', 'φ', 'ε', '∩']
-        char_list_15 = ['≡', '±', '≥', '≤', '⌠', '⌡', '÷', '≈', '˚', '•', '·', '√', 'ⁿ', '²', '■', ' ']
-                
-        char_array = np.array([char_list_0, char_list_1, char_list_2, char_list_3, char_list_4, char_list_5, char_list_6, char_list_7, \
-                               char_list_8, char_list_9, char_list_10, char_list_11, char_list_12, char_list_13, char_list_14, char_list_15])
-        return char_array
-    
-    def get_char_list(self, message):
-#        char_list = []
-#        if '/' not in message:
-#            char_list.extend(message)
-#        else:
-#            count = 0
-#            while( count<len(message)):
-#                if message[count] != '/':
-#                    char_list.append(message[count])
-#                    count += 1
-#                else:
-#                    search = True
-#                    for i in range(self.char_array.shape[0]):
-#                        for j in range(self.char_array.shape[1]):
-#                            
-#                            if self.char_array[i, j] in message[count:] and self.char_array[i, j] != '/' and '/' in self.char_array[i, j]:
-#                                if message[count:].index(self.char_array[i, j]) == 0:                                
-#                                    char_list.append(self.char_array[i, j])
-#                                    count += len(self.char_array[i, j])
-#                                    search = False
-#                                    break
-#                    if search:
-#                        char_list.append('/')
-#                        count += 1
-        char_list = list(message)             
-        return char_list
 
-    def get_cell_section(self, x, y, width, height):
-        section = np.empty([height, width], dtype=dict)
-        for i in range(height):
-            for j in range(width):
-                section[i, j] = self.get_cell(x + j, y + i).copy()
-        return section
-    
-    def set_cell_section(self, x, y, sec):
-        height = sec.shape[0]
-        width = sec.shape[1]
-        for i in range(height):
-            for j in range(width):
-                self.set_cell(x + j, y + i, sec[i, j])
-    
 class Flicker():
     def __init__(self, curses, flick_type=0, interval=1000):
         self.curses = curses
@@ -242,14 +320,10 @@ class Flicker():
         self.initialization()
         
     def initialization(self):
-        # Game config settings
-        config = configparser.ConfigParser()
-        config.read('config.ini')
-        self.fps = int(config['WINDOW']['fps'])
-        # Generate tick handler
+        # Generate clock handler
         self.flick_states = 2
         self.sel_ind = 0
-        self.tick = 0
+        self.start = time.monotonic()
     
     def load_cell(self, x, y):
         # Generate flick dictionary
@@ -266,12 +340,103 @@ class Flicker():
         self.flick_dict = {0 : self.curses.get_cell(x, y).copy(), 1 : flick}
     
     def update(self):
-        self.tick += 1
-        if self.tick >= self.fps*(self.interval/1000):
-            self.sel_ind += 1
-            self.sel_ind %= self.flick_states
-            self.tick = 0
+        self.sel_ind = int((time.monotonic() - self.start)/(self.interval/1000)) % self.flick_states
     
     def refresh(self , x, y):
         self.load_cell(x, y)
-        self.curses.set_cell(x, y, self.flick_dict[self.sel_ind])
\ No newline at end of file
+        self.curses.set_cell(x, y, self.flick_dict[self.sel_ind])
+
+# Batched flickering and cycling cells driven by a monotonic clock
+class Animator():
+    def __init__(self, curses, clock=time.monotonic):
+        self.curses = curses
+        self.clock = clock
+        self.initialization()
+    
+    def initialization(self):
+        # One row per animated cell, frames are padded to the longest cycle
+        self.xs = np.empty(0, dtype=np.intp)
+        self.ys = np.empty(0, dtype=np.intp)
+        self.frames = np.empty([0, 1], dtype=cell_dtype)
+        self.frame_counts = np.empty(0, dtype=np.intp)
+        self.intervals = np.empty(0, dtype=float)
+        self.starts = np.empty(0, dtype=float)
+        self.current = np.empty(0, dtype=np.intp)
+        self.grid_size = (self.curses.win_width, self.curses.win_height)
+    
+    def __len__(self):
+        return len(self.xs)
+    
+    # Cycle a cell through frames (cell records or dictionaries), interval in milliseconds
+    def add_cycle(self, x, y, frames, interval=1000, start=None):
+        records = np.empty(max(len(frames), self.frames.shape[1]), dtype=cell_dtype)
+        for i, frame in enumerate(frames):
+            if isinstance(frame, dict):
+                frame = self.curses.get_cell_record(frame['char'], frame['foreground'], frame['background'])
+            records[i] = frame
+        if len(frames) > self.frames.shape[1]:
+            padded = np.empty([len(self.xs), len(frames)], dtype=cell_dtype)
+            padded[:, :self.frames.shape[1]] = self.frames
+            self.frames = padded
+        
+        self.xs = np.append(self.xs, x)
+        self.ys = np.append(self.ys, y)
+        self.frames = np.concatenate([self.frames, records[None, :]])
+        self.frame_counts = np.append(self.frame_counts, len(frames))
+        self.intervals = np.append(self.intervals, interval/1000)
+        self.starts = np.append(self.starts, self.clock() if start is None else start)
+        self.current = np.append(self.current, -1)
+    
+    # Same flicker types as Flicker, based on the cell content when added
+    def add_flicker(self, x, y, flick_type=0, interval=1000, start=None):
+        cell = self.curses.window[y, x].copy()
+        if flick_type == 0:
+            flick = self.curses.get_cell_record(' ', 'transparent', 'transparent')
+        elif flick_type == 1:
+            flick = (cell['glyph'], cell['background'], cell['foreground'])
+        else:
+            raise ValueError('No flicker type.')
+        self.add_cycle(x, y, [cell, flick], interval, start)
+    
+    # Stop animating a cell and restore its first frame
+    def remove(self, x, y):
+        self.fit()
+        keep = (self.xs != x) | (self.ys != y)
+        removed = np.flatnonzero(~keep)
+        if len(removed):
+            self.curses.set_cell(x, y, self.frames[removed[0], 0])
+        self.select(keep)
+    
+    def select(self, keep):
+        for name in ('xs', 'ys', 'frames', 'frame_counts', 'intervals', 'starts', 'current'):
+            setattr(self, name, getattr(self, name)[keep])
+    
+    # Drop the cells left outside the window after it was resized
+    def fit(self):
+        grid_size = (self.curses.win_width, self.curses.win_height)
+        if grid_size != self.grid_size:
+            self.grid_size = grid_size
+            self.select((self.xs < grid_size[0]) & (self.ys < grid_size[1]))
+    
+    def clear(self):
+        self.fit()
+        self.curses.window[self.ys, self.xs] = self.frames[:, 0]
+        self.curses.dirty[self.ys, self.xs] = True
+        self.initialization()
+    
+    # Advance every animation and write the cells whose frame changed in one pass
+    def update(self, now=None):
+        if now is None:
+            now = self.clock()
+        self.fit()
+        frame = ((now - self.starts)//self.intervals).astype(np.intp) % self.frame_counts
+        changed = np.flatnonzero(frame != self.current)
+        if len(changed):
+            ys = self.ys[changed]
+            xs = self.xs[changed]
+            self.curses.window[ys, xs] = self.frames[changed, frame[changed]]
+            self.curses.dirty[ys, xs] = True
+            self.curses.stats.cells_written += len(changed)
+            self.current[changed] = frame[changed]
+        return len(changed)
+
@@ -1,3 +1,7 @@
+import numpy as np
+from .color import colorindex
+from .grid import cell_dtype
+
 class base():
     def __init__(self, curses):
         self.curses = curses
@@ -9,15 +13,16 @@ class base():
         pass
     
     def draw_hline(self, xmin, xmax, y, char, foreground, background):
-        for i in range(xmin, xmax + 1):
-            self.curses.put_char(i , y, char, foreground, background)
+        self.curses.draw_hline(xmin, xmax, y, char, foreground, background)
     
     def draw_vline(self, x, ymin, ymax, char, foreground, background):
-        for i in range(ymin, ymax + 1):
-            self.curses.put_char(x , i, char, foreground, background)
+        self.curses.draw_vline(x, ymin, ymax, char, foreground, background)
+    
+    def draw_rect(self, x, y, width, height, char, foreground, background):
+        self.curses.fill_cells(x, y, width, height, char, foreground, background)
 
 class Hline(base):
-    def __init__(self, xmin, xmax, y, curses, char=' ', foreground='white', background='trans'):
+    def __init__(self, xmin, xmax, y, curses, char=' ', foreground='white', background='transparent'):
         super(Hline, self).__init__(curses)
         self.xmin = xmin
         self.xmax = xmax
@@ -31,7 +36,7 @@ class Hline(base):
         self.draw_hline(self.xmin, self.xmax, self.y, self.char, self.foreground, self.background)
         
 class Vline(base):
-    def __init__(self, x, ymin, ymax, curses, char=' ', foreground='white', background='trans'):
+    def __init__(self, x, ymin, ymax, curses, char=' ', foreground='white', background='transparent'):
         super(Vline, self).__init__(curses)
         self.x = x
         self.ymin = ymin
@@ -45,7 +50,7 @@ class Vline(base):
         self.draw_vline(self.x, self.ymin, self.ymax, self.char, self.foreground, self.background)
 
 class Rect(base):
-    def __init__(self, x, y, width, height, curses, is_filled=True, char=' ', foreground='white', background='trans'):
+    def __init__(self, x, y, width, height, curses, is_filled=True, char=' ', foreground='white', background='transparent'):
         super(Rect, self).__init__(curses)
         self.x = x
         self.y = y
@@ -59,8 +64,7 @@ class Rect(base):
     
     def draw(self):
         if self.is_filled :
-            for i in range(self.height):
-                self.draw_hline(self.x, self.x + self.width-1, self.y + i, self.char, self.foreground, self.background)
+            self.draw_rect(self.x, self.y, self.width, self.height, self.char, self.foreground, self.background)
         else:
             self.draw_hline(self.x, self.x + self.width - 1, self.y, self.char, self.foreground, self.background)
             self.draw_hline(self.x, self.x + self.width - 1, self.y + self.height - 1, self.char, self.foreground, self.background)
@@ -68,7 +72,7 @@ class Rect(base):
             self.draw_vline(self.x + self.width - 1, self.y + 1, self.y + self.height - 2, self.char, self.foreground, self.background)
 
 class Frame(Rect):
-    def __init__(self, x, y, width, height, curses, style=0, is_filled=True, char=' ', foreground='white', background='trans', frame_foreground='white', frame_background='trans'):
+    def __init__(self, x, y, width, height, curses, style=0, is_filled=True, char=' ', foreground='white', background='transparent', frame_foreground='white', frame_background='transparent'):
         self.style = style
         self.frame_foreground = frame_foreground
         self.frame_background = frame_background
@@ -103,6 +107,87 @@ class Frame(Rect):
         self.curses.put_char(self.x + self.width - 1, self.y, self.UR, self.frame_foreground, self.frame_background)
         self.curses.put_char(self.x + self.width - 1, self.y + self.height - 1, self.DR, self.frame_foreground, self.frame_background)
         if self.is_filled:
-            for i in range(1, self.height-1):
-                self.draw_hline(self.x + 1, self.x + self.width - 2, self.y + i, self.char, self.foreground, self.background)
-        
\ No newline at end of file
+            self.draw_rect(self.x + 1, self.y + 1, self.width - 2, self.height - 2, self.char, self.foreground, self.background)
+        
+# Scrolling message log backed by a ring buffer of capacity wrapped lines
+class MessageLog(base):
+    def __init__(self, x, y, width, height, curses, capacity=200, foreground='white', background='transparent'):
+        super(MessageLog, self).__init__(curses)
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.capacity = max(capacity, height)
+        self.foreground = foreground
+        self.background = background
+        self.load_buffer()
+        self.initialization()
+    
+    def load_buffer(self):
+        # Line n is stored in slot n % capacity, lines before total - capacity are overwritten
+        self.lines = np.empty([self.capacity, self.width], dtype=cell_dtype)
+        self.blank = np.array(self.curses.get_cell_record(' ', self.foreground, self.background), dtype=cell_dtype)
+        self.total = 0
+        self.top = 0
+    
+    def get_bottom(self):
+        return max(self.total - self.height, 0)
+    
+    def get_first(self):
+        return max(self.total - self.capacity, 0)
+    
+    def append(self, message, foreground=None, background=None):
+        foreground = colorindex[self.foreground if foreground is None else foreground]
+        background = colorindex[self.background if background is None else background]
+        following = self.top == self.get_bottom()
+        first_line = self.total
+        for text in message.split('\n'):
+            glyphs = self.curses.char_index.get_glyphs(text)
+            for start in range(0, max(len(glyphs), 1), self.width):
+                line = self.lines[self.total % self.capacity]
+                line[:] = self.blank
+                chunk = glyphs[start:start + self.width]
+                line['glyph'][:len(chunk)] = chunk
+                line['foreground'][:len(chunk)] = foreground
+                line['background'][:len(chunk)] = background
+                self.total += 1
+        top = self.get_bottom() if following else max(self.top, self.get_first())
+        self.move_view(top, range(first_line, self.total))
+    
+    # Positive lines scroll back to older messages
+    def scroll(self, lines):
+        self.move_view(min(max(self.top - lines, self.get_first()), self.get_bottom()))
+    
+    def scroll_to_bottom(self):
+        self.move_view(self.get_bottom())
+    
+    # Shift the rows still in view and draw only exposed or changed rows
+    def move_view(self, top, changed=()):
+        shift = top - self.top
+        self.top = top
+        if abs(shift) >= self.height:
+            self.draw()
+            return
+        if shift > 0:
+            rows = set(range(self.height - shift, self.height))
+        else:
+            rows = set(range(-shift))
+        if shift != 0:
+            self.curses.scroll_section(self.x, self.y, self.width, self.height, 0, -shift)
+        rows.update(line - top for line in changed if 0 <= line - top < self.height)
+        for row in sorted(rows):
+            self.draw_row(row)
+    
+    def draw_row(self, row):
+        line = self.top + row
+        if self.get_first() <= line < self.total:
+            cells = self.lines[line % self.capacity]
+        else:
+            cells = np.full(self.width, self.blank, dtype=cell_dtype)
+        self.curses.set_cell_section(self.x, self.y + row, cells[None, :])
+    
+    def draw(self):
+        lines = np.arange(self.top, self.top + self.height)
+        cells = self.lines[lines % self.capacity]
+        cells[(lines < self.get_first()) | (lines >= self.total)] = self.blank
+        self.curses.set_cell_section(self.x, self.y, cells)
@@ -0,0 +1,312 @@
+import os
+import hashlib
+from collections import OrderedDict
+import pygame
+import numpy as np
+from .util import check_divisibility, load_config
+
+def get_char_array():
+    # Character to image mapping
+    char_list_0 = ['', '☺', '☻', '♥', '♦', '♣', '♠', '●', '◘', '○', '◙', '♂', '♀', '♪', '♫', '☼']
+    char_list_1 = ['▶', '◀', '↕', '‼', '¶', '§', '▬', '↨', '↑', '↓', '→', '←', '∟', '↔', '▲', '▼']
+    char_list_2 = [' ', '!', '"', '#', '$', '%', '&', '\'', '(', ')', '*', '+', ',', '-', '.', '/']
+    char_list_3 = ['0', '1', '2', '3', '4', '5', '6', '7', '8', '9', ':', ';', '<', '=', '>', '?']
+    char_list_4 = ['@', 'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', 'O']
+    char_list_5 = ['P', 'Q', 'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y', 'Z', '[', '\\', ']', '^', '_']
+    char_list_6 = ['`', 'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm', 'n', 'o']
+    char_list_7 = ['p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z', '{', '¦', '}', '~', '⌂']
+    char_list_8 = ['Ç', 'ü', 'é', 'â', 'ä', 'à', 'å', 'ç', 'ê', 'ë', 'è', 'ï', 'î', 'ì', 'Ä', 'Å']
+    char_list_9 = ['É', 'æ', 'Æ', 'ô', 'ö', 'ò', 'û', 'ù', 'ÿ', 'Ö', 'Ü', '¢', '£', '¥', '₧', 'ƒ']
+    char_list_10 = ['á', 'í', 'ó', 'ú', 'ñ', 'Ñ', 'ª', 'º', '¿', '⌐', '¬', '½', '¼', '¡', '«', '»']
+    char_list_11 = ['░', '▒', '▓', '│', '┤', '╡', '╢', '╖', '╕', '╣', '║', '╗', '╝', '╜', '╛', '┐']
+    char_list_12 = ['└', '┴', '┬', '├', '─', '┼', '╞', '╟', '╚', '╔', '╩', '╦', '╠', '═', '╬', '╧']
+    char_list_13 = ['╨', '╤', '╥', '╙', '╘', '╒', '╓', '╪', '╫', '┘', '┌', '█', '▄', '▌', '▐', '▀']
+    char_list_14 = ['α', 'β', 'Γ', 'Π', 'Σ', 'σ', 'μ', 'τ', 'Φ', 'Θ', 'Ω', 'δ', '∞', 'φ', 'ε', '∩']
+    char_list_15 = ['≡', '±', '≥', '≤', '⌠', '⌡', '÷', '≈', '˚', '•', '·', '√', 'ⁿ', '²', '■', ' ']
+            
+    char_array = np.array([char_list_0, char_list_1, char_list_2, char_list_3, char_list_4, char_list_5, char_list_6, char_list_7, \
+                           char_list_8, char_list_9, char_list_10, char_list_11, char_list_12, char_list_13, char_list_14, char_list_15])
+    return char_array
+
+# Character to glyph index shared by every curses window
+class CharIndex():
+
+    def __init__(self, char_array):
+        self.char_array = char_array
+        self.initialization()
+
+    def initialization(self):
+        self.columns = self.char_array.shape[1]
+        self.tile_count = self.char_array.size
+
+        # Glyph index to character, characters outside the tileset are appended after the tiles
+        self.chars = [str(char) for char in self.char_array.flat]
+        # First occurrence wins for characters listed twice in the tileset
+        self.glyph_dict = {}
+        for glyph, char in enumerate(self.chars):
+            self.glyph_dict.setdefault(char, glyph)
+
+        # Code point lookup table for batch conversion, unknown code points hold no_glyph
+        self.no_glyph = np.iinfo(np.uint16).max
+        self.code_table = np.full(0x10000, self.no_glyph, dtype=np.uint16)
+        for char, glyph in self.glyph_dict.items():
+            if len(char) == 1 and ord(char) < len(self.code_table):
+                self.code_table[ord(char)] = glyph
+
+    def add_char(self, char):
+        glyph = len(self.chars)
+        if glyph >= self.no_glyph:
+            raise ValueError('Glyph index overflow.')
+        self.chars.append(char)
+        self.glyph_dict[char] = glyph
+        if len(char) == 1 and ord(char) < len(self.code_table):
+            self.code_table[ord(char)] = glyph
+        return glyph
+
+    def get_glyph(self, char):
+        glyph = self.glyph_dict.get(char)
+        if glyph is None:
+            glyph = self.add_char(char)
+        return glyph
+
+    def get_char(self, glyph):
+        return self.chars[glyph]
+
+    # Tileset (row, column) of a character, None for characters outside the tileset
+    def get_position(self, char):
+        glyph = self.get_glyph(char)
+        if glyph >= self.tile_count:
+            return None
+        return divmod(glyph, self.columns)
+
+    # Batch lookup of a whole string into a glyph index array
+    def get_glyphs(self, message):
+        if not isinstance(message, str):
+            message = ''.join(message)
+        codes = np.frombuffer(message.encode('utf-32-le'), dtype=np.uint32)
+        glyphs = self.code_table[np.minimum(codes, len(self.code_table) - 1)]
+        unknown = (glyphs == self.no_glyph) | (codes >= len(self.code_table))
+        for i in np.flatnonzero(unknown):
+            glyphs[i] = self.get_glyph(message[i])
+        return glyphs
+
+char_index = CharIndex(get_char_array())
+
+# Font-rendered glyphs for characters outside the tileset, kept in overflow pages of page_size glyphs
+class FallbackGlyphs():
+
+    font = None
+    page_size = 256
+
+    def __init__(self, width, height, char_index=char_index):
+        self.width = width
+        self.height = height
+        self.char_index = char_index
+        self.initialization()
+
+    def initialization(self):
+        # Boolean foreground masks indexed (x, y) like surfarray
+        self.pages = []
+        self.loaded = []
+
+    # One font instance shared by every fallback glyph
+    def get_font(self):
+        if FallbackGlyphs.font is None:
+            FallbackGlyphs.font = pygame.font.Font(None, 50)
+        return FallbackGlyphs.font
+
+    def render_mask(self, char):
+        image = self.get_font().render(char, 0, (255, 255, 255), (0, 0, 0))
+        image = pygame.transform.scale(image, (self.width, self.height))
+        return pygame.surfarray.array3d(image)[:, :, 0] != 0
+
+    # Page holding every fallback glyph registered so far in its range
+    def get_page(self, page):
+        while len(self.pages) <= page:
+            self.pages.append(np.zeros([self.page_size, self.width, self.height], dtype=bool))
+            self.loaded.append(np.zeros(self.page_size, dtype=bool))
+        first = self.char_index.tile_count + page*self.page_size
+        count = min(len(self.char_index.chars) - first, self.page_size)
+        for slot in np.flatnonzero(~self.loaded[page][:count]):
+            self.pages[page][slot] = self.render_mask(self.char_index.get_char(first + slot))
+            self.loaded[page][slot] = True
+        return self.pages[page]
+
+    def get_mask(self, glyph):
+        page, slot = divmod(glyph - self.char_index.tile_count, self.page_size)
+        if page >= len(self.pages) or not self.loaded[page][slot]:
+            self.get_page(page)
+        return self.pages[page][slot]
+
+    def get_image(self, glyph, foreground, background):
+        return get_glyph_image(self.get_mask(glyph), foreground, background)
+
+# Fallback glyphs are shared by every window with the same cell size
+fallback_glyphs = {}
+
+def get_fallback_glyphs(width, height):
+    if (width, height) not in fallback_glyphs:
+        fallback_glyphs[(width, height)] = FallbackGlyphs(width, height)
+    return fallback_glyphs[(width, height)]
+
+# Build a glyph surface from a foreground mask
+def get_glyph_image(mask, foreground, background):
+    image = pygame.Surface(mask.shape, pygame.SRCALPHA, 32)
+    foreground = tuple(foreground)
+    background = tuple(background)
+    rgb = pygame.surfarray.pixels3d(image)
+    rgb[...] = np.where(mask[..., None], foreground[:3], background[:3])
+    del rgb
+    alpha = pygame.surfarray.pixels_alpha(image)
+    alpha[...] = np.where(mask, foreground[3], background[3])
+    del alpha
+    return image
+
+# Tileset glyph masks, decoded once per process and cached on disk per cell size
+class Tileset():
+
+    def __init__(self, path, width, height):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.initialization()
+
+    def initialization(self):
+        self.mtime = os.stat(self.path).st_mtime_ns
+        self.source = None
+        self.masks = {}
+        self.images = {}
+
+        # Default colors are read from the tileset image, cached with the masks
+        colors = self.load_cache('colors')
+        if colors is None:
+            self.load_source()
+        else:
+            self.background, self.foreground = [tuple(int(c) for c in color) for color in colors]
+
+    # Decode the tileset image into unscaled foreground masks indexed (glyph, x, y)
+    def load_source(self):
+        image = pygame.image.load(self.path)
+        surface = pygame.Surface(image.get_size(), 0, 32)
+        surface.blit(image, (0, 0))
+        columns = check_divisibility(self.width, surface.get_width())
+        rows = check_divisibility(self.height, surface.get_height())
+
+        self.background = tuple(surface.get_at((0, 0)))
+        self.foreground = tuple(surface.get_at(((columns - 5)*self.width, (rows - 3)*self.height)))
+        pixels = pygame.surfarray.array3d(surface)
+        mask = np.all(pixels == self.foreground[:3], axis=2)
+        mask = mask.reshape(columns, self.width, rows, self.height).transpose(2, 0, 1, 3)
+        self.source = mask.reshape(rows*columns, self.width, self.height)
+        self.save_cache('colors', np.array([self.background, self.foreground], dtype=np.uint8))
+        self.save_cache('source', self.source)
+
+    # Unscaled masks, kept in memory once loaded so any cell size is one scaling away
+    def get_source(self):
+        if self.source is None:
+            self.source = self.load_cache('source')
+        if self.source is None:
+            self.load_source()
+        return self.source
+
+    # Foreground masks scaled to the cell size, memory-mapped from the disk cache when available
+    def get_masks(self, cell_width, cell_height):
+        size = (cell_width, cell_height)
+        if size not in self.masks:
+            masks = self.load_cache('masks', size)
+            if masks is None:
+                masks = scale_masks(self.get_source(), cell_width, cell_height)
+                self.save_cache('masks', masks, size)
+            self.masks[size] = masks
+        return self.masks[size]
+
+    def get_image(self, glyph, cell_width, cell_height):
+        key = (glyph, cell_width, cell_height)
+        if key not in self.images:
+            self.images[key] = get_glyph_image(self.get_masks(cell_width, cell_height)[glyph], self.foreground, self.background)
+        return self.images[key]
+
+    def get_cache_path(self, name, size=None):
+        key = '{}-{}-{}x{}-{}'.format(os.path.abspath(self.path), self.mtime, self.width, self.height, size)
+        digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+        return os.path.join(get_cache_directory(), '{}-{}.npy'.format(digest, name))
+
+    def load_cache(self, name, size=None):
+        try:
+            return np.load(self.get_cache_path(name, size), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+
+    def save_cache(self, name, array, size=None):
+        path = self.get_cache_path(name, size)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = '{}.{}.tmp'.format(path, os.getpid())
+            with open(temp_path, 'wb') as f:
+                np.save(f, array)
+            os.replace(temp_path, path)
+        except OSError:
+            # Read-only cache location, keep going without it
+            pass
+
+# Tilesets are shared by every window in the process
+tilesets = {}
+
+def get_tileset(path, width, height):
+    key = (path, os.stat(path).st_mtime_ns, width, height)
+    if key not in tilesets:
+        tilesets[key] = Tileset(path, width, height)
+    return tilesets[key]
+
+def get_cache_directory():
+    directory = load_config()['CACHE'].get('directory', '')
+    if directory:
+        return os.path.expanduser(directory)
+    return os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')), 'pyguses')
+
+# Nearest-neighbour scaling of (glyph, x, y) masks in one indexing operation
+def scale_masks(masks, width, height):
+    x = np.arange(width)*masks.shape[1]//width
+    y = np.arange(height)*masks.shape[2]//height
+    return masks[:, x[:, None], y[None, :]]
+
+# Least-recently-used cache of tinted glyph surfaces keyed by (glyph, foreground, background)
+class GlyphCache():
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.initialization()
+
+    def initialization(self):
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.cache)
+
+    def __contains__(self, key):
+        return key in self.cache
+
+    def get(self, key):
+        surface = self.cache.get(key)
+        if surface is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.cache.move_to_end(key)
+        return surface
+
+    def put(self, key, surface):
+        self.cache[key] = surface
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.capacity:
+            self.cache.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.cache.clear()
+
+    def get_stats(self):
+        return {'size' : len(self.cache), 'capacity' : self.capacity, 'hits' : self.hits, 'misses' : self.misses, 'evictions' : self.evictions}
@@ -0,0 +1,197 @@
+import numpy as np
+from .color import colorlist, colorindex, Palette
+from .glyph import get_char_array, char_index
+from .layout import text_layout
+from .stats import FrameStats
+
+# Cell record: glyph index with foreground/background palette indices
+cell_dtype = np.dtype([('glyph', np.uint16), ('foreground', np.uint8), ('background', np.uint8)])
+
+# Cell grid with dirty tracking, shared by every render backend (no tileset or display needed)
+class CellGrid():
+
+    def __init__(self, win_width, win_height):
+        self.win_width = win_width
+        self.win_height = win_height
+        self.load_grid()
+
+    def load_grid(self):
+        # Generate frame statistics
+        self.stats = FrameStats()
+
+        # Generate character array
+        self.char_array = self.get_char_array()
+        self.char_index = char_index
+        self.text_layout = text_layout
+
+        # Generate empty window
+        self.window = np.empty([self.win_height, self.win_width], dtype=cell_dtype)
+        self.dirty = np.ones([self.win_height, self.win_width], dtype=bool)
+        self.clear_window()
+
+        # Optional panels composited over the window (see panel.LayerStack)
+        self.layers = None
+
+        # Generate palette, cells hold indices into its RGBA table
+        self.palette = Palette()
+
+    # Clear window
+    def clear_window(self):
+        self.window[:] = self.get_cell_record()
+        self.dirty[:] = True
+        self.stats.cells_written += self.window.size
+
+    def put_char(self, x, y, char=' ', foreground='white', background='transparent'):
+        self.window[y, x] = self.get_cell_record(char, foreground, background)
+        self.dirty[y, x] = True
+        self.stats.cells_written += 1
+
+    def put_message(self, x, y , message, foreground='white', background='transparent', auto=True, align='left', box_x=0, box_y=0, box_width=None, box_height=None):
+        if box_width == None:
+            box_width = self.win_width
+        if box_height == None:
+            box_height = self.win_height
+
+        # Cached layout written in one bulk operation
+        xs, ys, glyphs = self.text_layout.get_layout(message, x, y, auto, align, box_x, box_y, box_width, box_height)
+        self.put_cells(xs, ys, glyphs, colorindex[foreground], colorindex[background])
+
+    # Write a cell by glyph and palette indices
+    def put_glyph(self, x, y, glyph, foreground, background):
+        self.window[y, x] = (glyph, foreground, background)
+        self.dirty[y, x] = True
+        self.stats.cells_written += 1
+
+    # Bulk drawing: fill a block of cells with one record, clipped to the window
+    def fill_cells(self, x, y, width, height, char=' ', foreground='white', background='transparent'):
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + width, self.win_width), min(y + height, self.win_height)
+        if x1 > x0 and y1 > y0:
+            self.window[y0:y1, x0:x1] = self.get_cell_record(char, foreground, background)
+            self.dirty[y0:y1, x0:x1] = True
+            self.stats.cells_written += (x1 - x0)*(y1 - y0)
+
+    def draw_hline(self, xmin, xmax, y, char=' ', foreground='white', background='transparent'):
+        self.fill_cells(xmin, y, xmax - xmin + 1, 1, char, foreground, background)
+
+    def draw_vline(self, x, ymin, ymax, char=' ', foreground='white', background='transparent'):
+        self.fill_cells(x, ymin, 1, ymax - ymin + 1, char, foreground, background)
+
+    # Straight line between two cells, both ends included
+    def draw_line(self, x0, y0, x1, y1, char=' ', foreground='white', background='transparent'):
+        count = max(abs(x1 - x0), abs(y1 - y0)) + 1
+        xs = np.rint(np.linspace(x0, x1, count)).astype(np.intp)
+        ys = np.rint(np.linspace(y0, y1, count)).astype(np.intp)
+        glyph, foreground, background = self.get_cell_record(char, foreground, background)
+        self.put_cells(xs, ys, glyph, foreground, background)
+
+    # Write arrays (or scalars) of glyph and palette indices at arrays of positions, clipped to the window
+    def put_cells(self, xs, ys, glyphs, foregrounds, backgrounds):
+        xs, ys, glyphs, foregrounds, backgrounds = np.broadcast_arrays(xs, ys, glyphs, foregrounds, backgrounds)
+        inside = (xs >= 0) & (xs < self.win_width) & (ys >= 0) & (ys < self.win_height)
+        xs, ys = xs[inside], ys[inside]
+        self.window['glyph'][ys, xs] = glyphs[inside]
+        self.window['foreground'][ys, xs] = foregrounds[inside]
+        self.window['background'][ys, xs] = backgrounds[inside]
+        self.dirty[ys, xs] = True
+        self.stats.cells_written += len(xs)
+
+    # Compatibility view: cells are exposed as {'char', 'foreground', 'background'} dictionaries
+    def get_cell(self, x, y):
+        glyph, foreground, background = self.window[y, x].tolist()
+        return {'char' : self.get_char(glyph), 'foreground' : colorlist[foreground], 'background' : colorlist[background]}
+
+    def set_cell(self, x, y, cell):
+        if isinstance(cell, dict):
+            cell = self.get_cell_record(cell['char'], cell['foreground'], cell['background'])
+        self.window[y, x] = cell
+        self.dirty[y, x] = True
+        self.stats.cells_written += 1
+
+    def get_cell_record(self, char=' ', foreground='white', background='transparent'):
+        return (self.get_glyph(char), colorindex[foreground], colorindex[background])
+
+    # Character to glyph index (tileset glyphs first, then characters outside the tileset)
+    def get_glyph(self, char):
+        return self.char_index.get_glyph(char)
+
+    def get_char(self, glyph):
+        return self.char_index.get_char(glyph)
+
+    # Shift a block of cells by (dx, dy), the exposed strip is left for the caller to fill
+    def scroll_section(self, x, y, width, height, dx, dy):
+        box = (slice(y, y + height), slice(x, x + width))
+        if abs(dx) >= width or abs(dy) >= height:
+            self.dirty[box] = True
+            return
+
+        src = (slice(max(-dy, 0), height - max(dy, 0)), slice(max(-dx, 0), width - max(dx, 0)))
+        dst = (slice(max(dy, 0), height - max(-dy, 0)), slice(max(dx, 0), width - max(-dx, 0)))
+        self.window[box][dst] = self.window[box][src].copy()
+        self.dirty[box] = True
+
+    # Resize the window keeping the cells that still fit, new cells are blank
+    def resize_grid(self, win_width, win_height):
+        window = np.empty([win_height, win_width], dtype=cell_dtype)
+        window[:] = self.get_cell_record()
+        height, width = min(win_height, self.win_height), min(win_width, self.win_width)
+        window[:height, :width] = self.window[:height, :width]
+        self.win_width = win_width
+        self.win_height = win_height
+        self.window = window
+        self.dirty = np.ones([win_height, win_width], dtype=bool)
+        self.stats.cells_written += window.size
+        if self.layers is not None:
+            self.layers.load_frame()
+
+    # Cells shown by render backends: the window with its panels composited on top
+    def get_frame(self):
+        if self.layers is None:
+            return self.window
+        return self.layers.compose()
+
+    def get_char_array(self):
+        return get_char_array()
+
+    def get_char_list(self, message):
+#        char_list = []
+#        if '/' not in message:
+#            char_list.extend(message)
+#        else:
+#            count = 0
+#            while( count<len(message)):
+#                if message[count] != '/':
+#                    char_list.append(message[count])
+#                    count += 1
+#                else:
+#                    search = True
+#                    for i in range(self.char_array.shape[0]):
+#                        for j in range(self.char_array.shape[1]):
+#
+#                            if self.char_array[i, j] in message[count:] and self.char_array[i, j] != '/' and '/' in self.char_array[i, j]:
+#                                if message[count:].index(self.char_array[i, j]) == 0:
+#                                    char_list.append(self.char_array[i, j])
+#                                    count += len(self.char_array[i, j])
+#                                    search = False
+#                                    break
+#                    if search:
+#                        char_list.append('/')
+#                        count += 1
+        char_list = list(message)
+        return char_list
+
+    def get_cell_section(self, x, y, width, height):
+        return self.window[y:y + height, x:x + width].copy()
+
+    def set_cell_section(self, x, y, sec):
+        height = sec.shape[0]
+        width = sec.shape[1]
+        if sec.dtype == cell_dtype:
+            self.window[y:y + height, x:x + width] = sec
+            self.dirty[y:y + height, x:x + width] = True
+            self.stats.cells_written += sec.size
+        else:
+            # Sections of cell dictionaries
+            for i in range(height):
+                for j in range(width):
+                    self.set_cell(x + j, y + i, sec[i, j])
@@ -0,0 +1,79 @@
+from collections import OrderedDict
+import numpy as np
+from .glyph import char_index
+
+# Message layouts (cell positions and glyph indices) cached by message and box parameters
+class TextLayout():
+
+    def __init__(self, capacity=1024, char_index=char_index):
+        self.capacity = capacity
+        self.char_index = char_index
+        self.initialization()
+
+    def initialization(self):
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_layout(self, message, x, y, auto, align, box_x, box_y, box_width, box_height):
+        key = (message, x, y, auto, align, box_x, box_y, box_width, box_height)
+        layout = self.cache.get(key)
+        if layout is None:
+            self.misses += 1
+            layout = self.layout(*key)
+            self.cache[key] = layout
+            if len(self.cache) > self.capacity:
+                self.cache.popitem(last=False)
+        else:
+            self.hits += 1
+            self.cache.move_to_end(key)
+        return layout
+
+    # Wrapping and alignment rules of Curses.put_message, returns read-only (xs, ys, glyphs) arrays
+    def layout(self, message, x, y, auto, align, box_x, box_y, box_width, box_height):
+        glyphs = self.char_index.get_glyphs(message)
+        # Set alignment
+        if align == 'left':
+            cur_x = x
+        elif align == 'mid':
+            cur_x = x - int(len(glyphs)/2)
+        elif align == 'right':
+            cur_x = x - len(glyphs) + 1
+
+        # check initial cursor position
+        cur_y = y
+        if cur_x < box_x:
+            cur_y -= int(np.ceil( (box_x - cur_x) / box_width))
+            cur_x = box_x + box_width - (box_x - cur_x) % box_width
+
+        if cur_y < box_y:
+            glyphs = glyphs[(box_y - cur_y ) * box_width - (cur_x - box_x):]
+            cur_x = box_x
+            cur_y = box_y
+
+        xs = []
+        ys = []
+        shown = []
+        x_ = 0
+        for ind in range(len(glyphs)):
+            if auto :
+                if cur_x + x_ >= box_width + box_x:
+                    x_ -= box_width
+                    cur_y += 1
+                    if cur_y >= box_height + box_y:
+                        break
+                xs.append(cur_x + x_)
+                ys.append(cur_y)
+                shown.append(ind)
+            elif cur_x + x_ < box_width + box_x and cur_y < box_height + box_y - 1:
+                xs.append(cur_x + x_)
+                ys.append(cur_y)
+                shown.append(ind)
+            x_ += 1
+
+        layout = (np.array(xs, dtype=np.intp), np.array(ys, dtype=np.intp), glyphs[shown])
+        for array in layout:
+            array.setflags(write=False)
+        return layout
+
+text_layout = TextLayout()
@@ -0,0 +1,102 @@
+import time
+import pygame
+from .stats import LoopStats
+
+# Main loop around a curses window: game logic runs at a fixed timestep, rendering at most at fps
+class RunLoop():
+
+    def __init__(self, curses, update, render=None, events=None, timestep=1/60, fps=60, max_updates=5, max_skips=5, clock=time.perf_counter, sleep=time.sleep):
+        self.curses = curses
+        self.update = update
+        self.render = self.present if render is None else render
+        self.events = events
+        self.timestep = timestep
+        self.fps = fps
+        self.max_updates = max_updates
+        self.max_skips = max_skips
+        self.clock = clock
+        self.sleep = sleep
+        self.initialization()
+
+    def initialization(self):
+        self.stats = LoopStats()
+        self.running = False
+        # Simulated time and the real time not yet consumed by updates
+        self.time = 0
+        self.accumulator = 0
+        self.last = None
+        self.skipped = 0
+
+    # Seconds per rendered frame, renders follow the updates when fps is None
+    def get_frame_budget(self):
+        return self.timestep if self.fps is None else 1/self.fps
+
+    # Default render: redraw damaged cells and update only their rects on the display
+    def present(self, alpha):
+        rects = self.curses.update_window_surface()
+        screen = pygame.display.get_surface()
+        if screen is not None and rects:
+            for rect in rects:
+                screen.blit(self.curses.background, rect, rect)
+                screen.blit(self.curses.window_surface, rect, rect)
+            pygame.display.update(rects)
+
+    def poll_events(self):
+        if not pygame.display.get_init():
+            return
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.stop()
+            if self.events is not None:
+                self.events(event)
+
+    def run(self):
+        self.running = True
+        self.last = None
+        while self.running:
+            self.step()
+
+    def stop(self):
+        self.running = False
+
+    # One frame: poll events, catch up with fixed updates, render within the frame budget, then sleep
+    def step(self):
+        frame_start = self.clock()
+        if self.last is None:
+            self.last = frame_start
+        self.accumulator += frame_start - self.last
+        self.last = frame_start
+        self.poll_events()
+
+        updates = 0
+        while self.accumulator >= self.timestep:
+            if updates == self.max_updates:
+                # Too far behind: drop the backlog so the game slows down instead of spiralling
+                self.stats.dropped_updates += int(self.accumulator//self.timestep)
+                self.accumulator %= self.timestep
+                break
+            self.update(self.timestep)
+            self.time += self.timestep
+            self.accumulator -= self.timestep
+            updates += 1
+        update_end = self.clock()
+        self.stats.updates += updates
+        self.stats.update_time += update_end - frame_start
+
+        # Skip rendering when the updates used up the budget, a frame is still shown every max_skips frames
+        budget = self.get_frame_budget()
+        if update_end - frame_start > budget and self.skipped < self.max_skips:
+            self.skipped += 1
+            self.stats.skipped_renders += 1
+        else:
+            self.skipped = 0
+            self.render(self.accumulator/self.timestep)
+            self.stats.renders += 1
+            self.stats.render_time += self.clock() - update_end
+
+        # Yield the rest of the frame instead of busy-waiting
+        idle = frame_start + budget - self.clock()
+        if idle > 0:
+            self.sleep(idle)
+            self.stats.idle_time += idle
+        self.stats.end_frame()
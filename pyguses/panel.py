@@ -0,0 +1,128 @@
+import numpy as np
+from .grid import CellGrid
+
+# Cell layer drawn over a window at an offset, panels with a higher z are on top
+class Panel(CellGrid):
+
+    def __init__(self, x, y, width, height, z=0, visible=True):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.visible = visible
+        self.stack = None
+        super(Panel, self).__init__(width, height)
+
+    def damage(self):
+        if self.stack is not None and self.visible:
+            self.stack.damage_rect(self.x, self.y, self.win_width, self.win_height)
+
+    # Showing, hiding and moving copy no cells, only the footprint is recomposed
+    def show(self):
+        self.visible = True
+        self.damage()
+
+    def hide(self):
+        self.damage()
+        self.visible = False
+
+    def move(self, x, y):
+        self.damage()
+        self.x = x
+        self.y = y
+        self.damage()
+
+    def set_z(self, z):
+        self.z = z
+        if self.stack is not None:
+            self.stack.sort()
+        self.damage()
+
+# Panels composited over the cells of a grid, the grid renders the composed frame
+class LayerStack():
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.initialization()
+
+    def initialization(self):
+        self.panels = []
+        self.load_frame()
+        self.grid.layers = self
+
+    # Composed frame of the grid size, fully recomposed on the next compose
+    def load_frame(self):
+        self.frame = self.grid.window.copy()
+        # Window cells as last composed, the grid's dirty flags belong to its renderer and may never be cleared
+        self.window = self.grid.window.copy()
+        # Cells to recompose whatever the window holds (panel changes, moves, scrolled pixels)
+        self.damage = np.ones(self.grid.window.shape, dtype=bool)
+
+    def add(self, panel):
+        panel.stack = self
+        self.panels.append(panel)
+        self.sort()
+        panel.damage()
+        return panel
+
+    def remove(self, panel):
+        panel.damage()
+        self.panels.remove(panel)
+        panel.stack = None
+
+    # Bottom to top, panels of equal z keep the order they were added in
+    def sort(self):
+        self.panels.sort(key=lambda panel: panel.z)
+
+    # Window box and panel box of the part of a rect inside the window, None when outside
+    def clip(self, x, y, width, height):
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + width, self.grid.win_width), min(y + height, self.grid.win_height)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return (slice(y0, y1), slice(x0, x1)), (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+
+    def damage_rect(self, x, y, width, height):
+        boxes = self.clip(x, y, width, height)
+        if boxes is not None:
+            self.damage[boxes[0]] = True
+
+    # Bring the composed frame up to date, recomposed cells are marked dirty in the grid
+    def compose(self):
+        visible = [panel for panel in self.panels if panel.visible]
+        for panel in visible:
+            boxes = self.clip(panel.x, panel.y, panel.win_width, panel.win_height)
+            if boxes is not None:
+                self.damage[boxes[0]] |= panel.dirty[boxes[1]]
+            panel.dirty[:] = False
+        damage = self.damage
+        damage |= self.grid.window != self.window
+        if not damage.any():
+            return self.frame
+
+        self.window[damage] = self.grid.window[damage]
+        self.frame[damage] = self.grid.window[damage]
+        transparent = self.grid.palette.table[:, 3] == 0
+        blank = np.zeros(len(self.grid.char_index.chars), dtype=bool)
+        blank[[self.grid.get_glyph(''), self.grid.get_glyph(' ')]] = True
+        for panel in visible:
+            boxes = self.clip(panel.x, panel.y, panel.win_width, panel.win_height)
+            if boxes is None:
+                continue
+            box, panel_box = boxes
+            mask = damage[box]
+            if not mask.any():
+                continue
+            cells = panel.window[panel_box]
+            under = self.frame[box]
+            # Transparent backgrounds show the background below, blank transparent cells show the whole cell below
+            see_through = transparent[cells['background']]
+            mask = mask & ~(see_through & blank[cells['glyph']])
+            under['glyph'][mask] = cells['glyph'][mask]
+            under['foreground'][mask] = cells['foreground'][mask]
+            opaque = mask & ~see_through
+            under['background'][opaque] = cells['background'][opaque]
+
+        self.grid.dirty |= damage
+        self.grid.stats.cells_composed += int(np.count_nonzero(damage))
+        damage[:] = False
+        return self.frame
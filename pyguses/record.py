@@ -0,0 +1,229 @@
+import json
+import time
+import struct
+import numpy as np
+from .grid import cell_dtype
+from .glyph import char_index
+
+# Recording file: a header, then frames holding the cells changed since the previous frame
+# header: magic, grid width, grid height, tileset glyph count, capture rate
+# frame:  time, run count, byte sizes of the new characters and the palette, then
+#         new characters (JSON list), palette table (RGBA rows), runs (start, length) and the cells of the runs
+magic = b'PYGUSES\x01'
+header_format = struct.Struct('<8sIIId')
+frame_format = struct.Struct('<dIII')
+run_dtype = np.dtype('<u4')
+record_dtype = np.dtype([('glyph', '<u2'), ('foreground', 'u1'), ('background', 'u1')])
+
+# Runs of flat indices where changed is set, one-cell gaps are merged since a run costs two cells
+def get_runs(changed):
+    changed = changed.copy()
+    changed[1:-1] |= changed[:-2] & changed[2:]
+    edges = np.flatnonzero(np.diff(changed.view(np.int8), prepend=0, append=0))
+    starts = edges[0::2]
+    return np.stack([starts, edges[1::2] - starts], axis=1).astype(run_dtype)
+
+def encode_frame(frame_time, cells, runs, chars=(), palette=None):
+    chars = json.dumps(list(chars)).encode('utf-8') if chars else b''
+    palette = b'' if palette is None else np.ascontiguousarray(palette, dtype=np.uint8).tobytes()
+    flat = cells.reshape(-1)
+    if len(runs) == 1:
+        data = flat[runs[0, 0]:runs[0, 0] + runs[0, 1]]
+    else:
+        data = np.concatenate([flat[start:start + length] for start, length in runs.tolist()]) if len(runs) else flat[:0]
+    return b''.join([frame_format.pack(frame_time, len(runs), len(chars), len(palette)), chars, palette, runs.tobytes(), data.astype(record_dtype).tobytes()])
+
+# Parse a recording (memory-mapped) into a header and frame tuples (time, chars, palette, runs, cells)
+def read_frames(path):
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    if len(data) < header_format.size:
+        raise ValueError('Not a pyguses recording.')
+    header = header_format.unpack_from(data, 0)
+    if header[0] != magic:
+        raise ValueError('Not a pyguses recording.')
+    frames = []
+    offset = header_format.size
+    # A truncated last frame (e.g. the recorder was not closed) is dropped
+    while offset + frame_format.size <= len(data):
+        frame_time, run_count, chars_size, palette_size = frame_format.unpack_from(data, offset)
+        start = offset + frame_format.size
+        runs_start = start + chars_size + palette_size
+        cells_start = runs_start + run_count*2*run_dtype.itemsize
+        if cells_start > len(data):
+            break
+        runs = data[runs_start:cells_start].view(run_dtype).reshape(-1, 2)
+        offset = cells_start + int(runs[:, 1].sum())*record_dtype.itemsize
+        if offset > len(data):
+            break
+        chars = json.loads(bytes(data[start:start + chars_size]).decode('utf-8')) if chars_size else []
+        palette = data[start + chars_size:runs_start].reshape(-1, 4) if palette_size else None
+        cells = data[cells_start:offset].view(record_dtype)
+        frames.append((frame_time, chars, palette, runs, cells))
+    return header[1:], frames
+
+# Snapshot: a recording of one full frame, the cells are memory-mapped on load
+def save_snapshot(grid, path):
+    with Recorder(grid, path, None) as recorder:
+        recorder.capture(0)
+
+# Cells of a snapshot (read-only memory map unless glyphs had to be renumbered) and its palette table
+def load_snapshot(path):
+    (width, height, tile_count, fps), frames = read_frames(path)
+    if not frames:
+        raise ValueError('Empty snapshot.')
+    frame_time, chars, palette, runs, cells = frames[0]
+    cells = cells.view(cell_dtype).reshape(height, width)
+    glyph_map = get_glyph_map(tile_count, chars)
+    if not np.array_equal(glyph_map, np.arange(len(glyph_map))):
+        cells = np.array(cells)
+        cells['glyph'] = glyph_map[cells['glyph']]
+    return cells, None if palette is None else np.array(palette)
+
+# Glyph indices of a recording to this process, characters outside the tileset are registered again
+def get_glyph_map(tile_count, chars, glyph_map=None):
+    if glyph_map is None:
+        glyph_map = np.arange(tile_count, dtype=np.uint16)
+    return np.concatenate([glyph_map, np.array([char_index.get_glyph(char) for char in chars], dtype=np.uint16)])
+
+# Capture the cells of a grid at a fixed rate, only changed cells are written
+class Recorder():
+
+    def __init__(self, grid, path, fps=60, clock=time.monotonic):
+        self.grid = grid
+        self.path = path
+        self.fps = fps
+        self.clock = clock
+        self.initialization()
+
+    def initialization(self):
+        # The recording keeps the grid size it was started with
+        self.width = self.grid.win_width
+        self.height = self.grid.win_height
+        self.file = open(self.path, 'wb')
+        self.file.write(header_format.pack(magic, self.width, self.height, self.grid.char_index.tile_count, self.fps or 0))
+        # First frame is compared against nothing, every cell is written
+        self.last = None
+        self.char_count = self.grid.char_index.tile_count
+        self.palette_version = None
+        self.start = None
+        self.next_time = None
+        self.frames = 0
+        self.bytes_written = header_format.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    # Record the grid unless the last frame is more recent than the capture interval, returns True when captured
+    def capture(self, now=None):
+        now = self.clock() if now is None else now
+        if self.start is None:
+            self.start = now
+            self.next_time = now
+        if self.fps:
+            # Captures follow a fixed schedule, half an interval of clock jitter is tolerated
+            if now < self.next_time - 0.5/self.fps:
+                return False
+            self.next_time = max(self.next_time + 1/self.fps, now)
+
+        window = self.get_cells()
+        if self.last is None:
+            self.last = window.copy()
+            runs = np.array([[0, window.size]], dtype=run_dtype)
+        else:
+            changed = (window != self.last).reshape(-1)
+            runs = get_runs(changed)
+            self.last.reshape(-1)[changed] = window.reshape(-1)[changed]
+
+        chars = self.grid.char_index.chars[self.char_count:]
+        self.char_count += len(chars)
+        palette = None
+        if self.grid.palette.version != self.palette_version:
+            self.palette_version = self.grid.palette.version
+            palette = self.grid.palette.table
+
+        frame = encode_frame(now - self.start, window, runs, chars, palette)
+        self.file.write(frame)
+        self.bytes_written += len(frame)
+        self.frames += 1
+        return True
+
+    # Cells of the grid at the recorded size, cropped or padded with blank cells after the grid was resized
+    def get_cells(self):
+        window = self.grid.get_frame()
+        if window.shape == (self.height, self.width):
+            return window
+        cells = np.empty([self.height, self.width], dtype=cell_dtype)
+        cells[:] = self.grid.get_cell_record()
+        height, width = min(self.height, window.shape[0]), min(self.width, window.shape[1])
+        cells[:height, :width] = window[:height, :width]
+        return cells
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+# Replay a recording into a grid (e.g. a Curses window) in real time or frame by frame
+class Player():
+
+    def __init__(self, path, grid, speed=1.0, clock=time.monotonic):
+        self.path = path
+        self.grid = grid
+        self.speed = speed
+        self.clock = clock
+        self.initialization()
+
+    def initialization(self):
+        (self.width, self.height, self.tile_count, self.fps), self.frames = read_frames(self.path)
+        if self.width > self.grid.win_width or self.height > self.grid.win_height:
+            raise ValueError('Recording does not fit the window.')
+        self.rewind()
+
+    def __len__(self):
+        return len(self.frames)
+
+    def rewind(self):
+        self.glyph_map = np.arange(self.tile_count, dtype=np.uint16)
+        self.index = -1
+        self.start = None
+
+    def is_finished(self):
+        return self.index >= len(self.frames) - 1
+
+    def apply_frame(self, index):
+        frame_time, chars, palette, runs, cells = self.frames[index]
+        if chars:
+            self.glyph_map = get_glyph_map(0, chars, self.glyph_map)
+        if palette is not None:
+            self.grid.palette.set_table(palette)
+        if len(cells):
+            # Flat cell indices of the runs
+            starts, lengths = runs.astype(np.intp).T
+            flat = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(len(cells))
+            ys, xs = np.divmod(flat, self.width)
+            self.grid.put_cells(xs, ys, self.glyph_map[cells['glyph']], cells['foreground'], cells['background'])
+        self.index = index
+
+    # Jump to a frame, earlier frames are replayed from the start
+    def seek(self, index):
+        index = min(index, len(self.frames) - 1)
+        if index < self.index:
+            self.rewind()
+        for i in range(self.index + 1, index + 1):
+            self.apply_frame(i)
+
+    # Apply every frame due at the playback time, returns True when the grid changed
+    def update(self, now=None):
+        now = self.clock() if now is None else now
+        if self.start is None:
+            self.start = now
+        elapsed = (now - self.start)*self.speed
+        index = self.index
+        while index + 1 < len(self.frames) and self.frames[index + 1][0] <= elapsed:
+            index += 1
+        if index == self.index:
+            return False
+        self.seek(index)
+        return True
@@ -0,0 +1,191 @@
+import time
+import threading
+import pygame
+import numpy as np
+
+class AtlasRenderer():
+
+    def __init__(self, curses):
+        self.curses = curses
+        self.initialization()
+
+    def initialization(self):
+        self.cell_width = self.curses.cell_width
+        self.cell_height = self.curses.cell_height
+
+        # Glyph atlas: one boolean foreground mask per glyph index, stored (x, y) like surfarray
+        self.atlas = self.curses.tileset.get_masks(self.cell_width, self.cell_height)
+        self.glyph_count = len(self.atlas)
+
+    # Copy fallback glyph pages into the atlas when new characters have been registered
+    def load_glyphs(self):
+        char_index = self.curses.char_index
+        glyph_count = len(char_index.chars)
+        if glyph_count > self.glyph_count:
+            fallback = self.curses.fallback_glyphs
+            first_page = (self.glyph_count - char_index.tile_count)//fallback.page_size
+            last_page = (glyph_count - 1 - char_index.tile_count)//fallback.page_size
+            atlas_size = char_index.tile_count + (last_page + 1)*fallback.page_size
+            if atlas_size > len(self.atlas):
+                self.atlas = np.concatenate([self.atlas, np.zeros((atlas_size - len(self.atlas),) + self.atlas.shape[1:], dtype=bool)])
+            for page in range(first_page, last_page + 1):
+                start = char_index.tile_count + page*fallback.page_size
+                self.atlas[start:start + fallback.page_size] = fallback.get_page(page)
+            self.glyph_count = glyph_count
+
+    # Pack RGBA rows into mapped 32-bit pixels of the given format
+    def map_colors(self, colors, shifts, losses):
+        colors = colors.astype(np.uint32)
+        mapped = np.zeros(colors.shape[:-1], dtype=np.uint32)
+        for channel in range(4):
+            mapped |= (colors[..., channel] >> losses[channel]) << shifts[channel]
+        return mapped
+
+    # Multiply per-cell RGBA colors by a light level, alpha is kept
+    def apply_light(self, colors, light):
+        lit = colors.astype(np.float32)
+        lit[..., :3] *= light[..., None]
+        return np.clip(lit, 0, 255).astype(np.uint8)
+
+    # Compose a block of cells into mapped pixels indexed (x, y) like surfarray
+    def compose(self, cells, shifts, losses, light=None):
+        self.load_glyphs()
+        return self.compose_frame(cells, self.atlas, self.curses.palette.table, shifts, losses, light)
+
+    # Composition from explicit atlas and palette arrays, safe to run outside the main thread
+    def compose_frame(self, cells, atlas, palette, shifts, losses, light=None):
+        height, width = cells.shape
+        cell_width, cell_height = atlas.shape[1:]
+
+        # Colors are mapped once per cell, pixels are picked by the glyph masks
+        cells = cells.T
+        masks = atlas[cells['glyph']]
+        foreground = palette[cells['foreground']]
+        background = palette[cells['background']]
+        if light is not None:
+            foreground = self.apply_light(foreground, light.T)
+            background = self.apply_light(background, light.T)
+        foreground = self.map_colors(foreground, shifts, losses)
+        background = self.map_colors(background, shifts, losses)
+        frame = np.where(masks, foreground[:, :, None, None], background[:, :, None, None])
+        return frame.transpose(0, 2, 1, 3).reshape(width*cell_width, height*cell_height)
+
+    # Draw a block of cells onto a surface at cell position (x, y)
+    def draw(self, surface, cells, x=0, y=0, light=None):
+        if surface.get_bytesize() != 4 or not surface.get_flags() & pygame.SRCALPHA:
+            # Compose on a 32-bit alpha surface and let pygame convert and blend it over the target
+            temp = pygame.Surface((cells.shape[1]*self.cell_width, cells.shape[0]*self.cell_height), pygame.SRCALPHA, 32)
+            self.curses.stats.surface_allocations += 1
+            self.draw(temp, cells, 0, 0, light)
+            surface.blit(temp, (x*self.cell_width, y*self.cell_height))
+            return
+
+        frame = self.compose(cells, surface.get_shifts(), surface.get_losses(), light)
+        px = x*self.cell_width
+        py = y*self.cell_height
+        width, height = frame.shape
+
+        pixels = pygame.surfarray.pixels2d(surface)
+        pixels[px:px + width, py:py + height] = frame
+        del pixels
+
+# Double-buffered rendering: the game thread publishes cell snapshots, a worker composes them
+class ThreadedRenderer():
+
+    def __init__(self, curses):
+        self.curses = curses
+        self.initialization()
+
+    def initialization(self):
+        self.renderer = self.curses.renderer
+        # Front buffer shown by the main loop, frames are composed in its pixel format
+        self.load_surface(self.curses.window_surface.get_size())
+
+        self.condition = threading.Condition()
+        self.snapshot = None
+        self.back_buffer = None
+        self.published = 0
+        self.composed = 0
+        self.shown = 0
+        self.compose_time = 0
+        self.thread = None
+        self.running = False
+
+    def load_surface(self, size):
+        self.surface = pygame.Surface(size, pygame.SRCALPHA, 32)
+        self.shifts = self.surface.get_shifts()
+        self.losses = self.surface.get_losses()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        if self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self.run, name='pyguses-render', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    # Hand an immutable copy of the grid to the worker, an unconsumed older snapshot is dropped
+    def publish(self):
+        self.renderer.load_glyphs()
+        cells = self.curses.get_frame().copy()
+        cells.setflags(write=False)
+        light = None if self.curses.light is None else self.curses.light.copy()
+        with self.condition:
+            self.published += 1
+            self.snapshot = (self.published, cells, self.renderer.atlas, self.curses.palette.table.copy(), light)
+            self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and self.snapshot is None:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                frame_id, cells, atlas, palette, light = self.snapshot
+                self.snapshot = None
+
+            # NumPy releases the GIL for the large array operations of the composition
+            start = time.perf_counter()
+            frame = self.renderer.compose_frame(cells, atlas, palette, self.shifts, self.losses, light)
+            with self.condition:
+                self.compose_time = time.perf_counter() - start
+                self.back_buffer = frame
+                self.composed = frame_id
+                self.condition.notify_all()
+
+    # Wait for the frame of the last publish (timeout in seconds)
+    def wait(self, timeout=None):
+        with self.condition:
+            return self.condition.wait_for(lambda: self.composed >= self.published or not self.running, timeout)
+
+    # Copy the newest finished frame to the front surface, False when nothing new was composed
+    def flip(self):
+        with self.condition:
+            frame = self.back_buffer
+            self.back_buffer = None
+            frame_id = self.composed
+        if frame is None:
+            return False
+        if frame.shape != self.surface.get_size():
+            # The window was resized, the front buffer follows the composed frame
+            self.load_surface(frame.shape)
+        pixels = pygame.surfarray.pixels2d(self.surface)
+        pixels[...] = frame
+        del pixels
+        self.shown = frame_id
+        return True
+
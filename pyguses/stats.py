@@ -0,0 +1,79 @@
+import time
+from collections import deque
+
+# Per-frame counters and timings of a curses window, reported to hooks at the end of every frame
+class FrameStats():
+
+    counters = ('cells_written', 'cells_redrawn', 'cells_composed', 'surface_allocations')
+    timers = ('tint_time', 'blit_time')
+    cache_counters = ('hits', 'misses', 'evictions')
+
+    def __init__(self, history=120):
+        self.history = deque(maxlen=history)
+        self.initialization()
+
+    def initialization(self):
+        self.hooks = []
+        self.frame = 0
+        self.last = None
+        self.cache_base = None
+        self.frame_start = time.perf_counter()
+        self.reset()
+
+    def reset(self):
+        for name in self.counters + self.timers:
+            setattr(self, name, 0)
+
+    # Hooks are called with the finished frame dictionary
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def end_frame(self, cache=None):
+        now = time.perf_counter()
+        frame = {name : getattr(self, name) for name in self.counters + self.timers}
+        frame['frame'] = self.frame
+        frame['frame_time'] = now - self.frame_start
+
+        # Glyph cache counters are cumulative, report the difference since the last frame (since zero for the first)
+        if cache is not None:
+            current = [getattr(cache, name) for name in self.cache_counters]
+            base = self.cache_base if self.cache_base is not None else [0]*len(self.cache_counters)
+            for name, value, start in zip(self.cache_counters, current, base):
+                frame['cache_' + name] = value - start
+            frame['cache_size'] = len(cache)
+            self.cache_base = current
+
+        self.last = frame
+        self.history.append(frame)
+        for hook in self.hooks:
+            hook(frame)
+
+        self.frame += 1
+        self.frame_start = now
+        self.reset()
+        return frame
+
+    def get_stats(self):
+        return self.last
+
+    # Mean and maximum of every value over the recorded frames
+    def get_summary(self):
+        if not self.history:
+            return {}
+        summary = {}
+        for name in self.history[-1]:
+            if name == 'frame':
+                continue
+            values = [frame.get(name, 0) for frame in self.history]
+            summary[name] = {'mean' : sum(values)/len(values), 'max' : max(values)}
+        summary['frames'] = len(self.history)
+        return summary
+
+# Per-frame counters and timings of a run loop
+class LoopStats(FrameStats):
+
+    counters = ('updates', 'renders', 'skipped_renders', 'dropped_updates')
+    timers = ('update_time', 'render_time', 'idle_time')
@@ -1,6 +1,19 @@
+import os
+import configparser
+
 # check divisibility
 def check_divisibility(divisor, dividend):
     if dividend % divisor != 0:
         raise ValueError('Value not divisable.')
     return int(dividend/divisor)
 
+# Package config, parsed once per process
+config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.ini')
+configs = {}
+
+def load_config(path=config_path):
+    if path not in configs:
+        config = configparser.ConfigParser()
+        config.read(path)
+        configs[path] = config
+    return configs[path]
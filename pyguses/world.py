@@ -0,0 +1,180 @@
+import os
+import json
+import numpy as np
+from .color import colorindex
+from .glyph import char_index
+from .grid import cell_dtype
+from .record import get_glyph_map
+
+# Cell map of arbitrary size stored in square chunks, optionally memory-mapped from a .npy file
+# Characters outside the tileset are saved next to the file (<name>.chars.json) and renumbered on load,
+# existing files are opened read-only unless writable is set
+class WorldMap():
+
+    def __init__(self, width, height, chunk_size=64, path=None, writable=False):
+        self.width = width
+        self.height = height
+        self.chunk_size = chunk_size
+        self.path = path
+        self.writable = writable
+        self.initialization()
+
+    def initialization(self):
+        self.blank = np.array(self.get_cell_record(), dtype=cell_dtype)
+
+        if self.path is None:
+            # Chunks are allocated on first write, missing chunks read as blank cells
+            self.cells = None
+            self.chunks = {}
+        elif os.path.exists(self.path):
+            self.cells = np.load(self.path, mmap_mode='r+' if self.writable else 'r')
+            if self.cells.dtype != cell_dtype or self.cells.shape != (self.height, self.width):
+                raise ValueError('World map file does not match.')
+            self.load_chars()
+        else:
+            self.cells = np.lib.format.open_memmap(self.path, mode='w+', dtype=cell_dtype, shape=(self.height, self.width))
+            self.cells[:] = self.blank
+            self.save_chars()
+
+    def get_chars_path(self):
+        return os.path.splitext(self.path)[0] + '.chars.json'
+
+    # Glyph indices of the file to this process, renumbered in place when writable, in a copy otherwise
+    def load_chars(self):
+        try:
+            with open(self.get_chars_path(), encoding='utf-8') as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        glyph_map = get_glyph_map(saved['tile_count'], saved['chars'])
+        if np.array_equal(glyph_map, np.arange(len(glyph_map))):
+            return
+        glyphs = self.cells['glyph']
+        if glyphs.size and int(glyphs.max()) >= len(glyph_map):
+            raise ValueError('World map characters are missing, flush() after writing.')
+        if not self.writable:
+            self.cells = np.array(self.cells)
+        self.cells['glyph'] = glyph_map[self.cells['glyph']]
+        if self.writable:
+            self.save_chars()
+
+    # Characters of every glyph index that can be in the file
+    def save_chars(self):
+        saved = {'tile_count' : char_index.tile_count, 'chars' : char_index.chars[char_index.tile_count:]}
+        with open(self.get_chars_path(), 'w', encoding='utf-8') as f:
+            json.dump(saved, f, ensure_ascii=False)
+
+    def get_cell_record(self, char=' ', foreground='white', background='transparent'):
+        return (char_index.get_glyph(char), colorindex[foreground], colorindex[background])
+
+    # Chunk (cx, cy) as a cell array view, None for unallocated chunks unless create is set
+    def get_chunk(self, cx, cy, create=False):
+        if self.cells is not None:
+            return self.cells[cy*self.chunk_size:(cy + 1)*self.chunk_size, cx*self.chunk_size:(cx + 1)*self.chunk_size]
+        chunk = self.chunks.get((cx, cy))
+        if chunk is None and create:
+            chunk = np.empty([self.chunk_size, self.chunk_size], dtype=cell_dtype)
+            chunk[:] = self.blank
+            self.chunks[(cx, cy)] = chunk
+        return chunk
+
+    # Chunks overlapping a region with the overlap in world and chunk coordinates
+    def iter_chunks(self, x, y, width, height):
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + width, self.width), min(y + height, self.height)
+        for cy in range(y0//self.chunk_size, (y1 - 1)//self.chunk_size + 1 if y1 > y0 else 0):
+            for cx in range(x0//self.chunk_size, (x1 - 1)//self.chunk_size + 1 if x1 > x0 else 0):
+                left, top = cx*self.chunk_size, cy*self.chunk_size
+                wx0, wy0 = max(x0, left), max(y0, top)
+                wx1, wy1 = min(x1, left + self.chunk_size), min(y1, top + self.chunk_size)
+                yield cx, cy, (slice(wy0 - y, wy1 - y), slice(wx0 - x, wx1 - x)), (slice(wy0 - top, wy1 - top), slice(wx0 - left, wx1 - left))
+
+    def put_char(self, x, y, char=' ', foreground='white', background='transparent'):
+        chunk = self.get_chunk(x//self.chunk_size, y//self.chunk_size, True)
+        chunk[y % self.chunk_size, x % self.chunk_size] = self.get_cell_record(char, foreground, background)
+
+    # Copy of a region, cells outside the world are blank
+    def get_region(self, x, y, width, height):
+        region = np.empty([height, width], dtype=cell_dtype)
+        region[:] = self.blank
+        for cx, cy, region_box, chunk_box in self.iter_chunks(x, y, width, height):
+            chunk = self.get_chunk(cx, cy)
+            if chunk is not None:
+                region[region_box] = chunk[chunk_box]
+        return region
+
+    def set_region(self, x, y, cells):
+        for cx, cy, region_box, chunk_box in self.iter_chunks(x, y, cells.shape[1], cells.shape[0]):
+            self.get_chunk(cx, cy, True)[chunk_box] = cells[region_box]
+
+    def fill(self, x, y, width, height, char=' ', foreground='white', background='transparent'):
+        record = np.array(self.get_cell_record(char, foreground, background), dtype=cell_dtype)
+        for cx, cy, region_box, chunk_box in self.iter_chunks(x, y, width, height):
+            self.get_chunk(cx, cy, True)[chunk_box] = record
+
+    def flush(self):
+        # Read-only maps (and their renumbered copies) are never written back
+        if isinstance(self.cells, np.memmap) and self.cells.flags.writeable:
+            self.cells.flush()
+            self.save_chars()
+
+# Camera showing a region of a world map in a block of curses cells
+class Viewport():
+
+    def __init__(self, world, curses, x=0, y=0, width=None, height=None, world_x=0, world_y=0):
+        self.world = world
+        self.curses = curses
+        self.x = x
+        self.y = y
+        # Requested size, None follows the window
+        self.view_width = width
+        self.view_height = height
+        self.world_x = world_x
+        self.world_y = world_y
+        self.initialization()
+
+    def initialization(self):
+        self.grid_size = None
+        self.draw()
+
+    # Fit the view to the window, returns True when the window size changed since the last fit
+    def fit(self):
+        grid_size = (self.curses.win_width, self.curses.win_height)
+        if grid_size == self.grid_size:
+            return False
+        self.grid_size = grid_size
+        self.width = max(grid_size[0] - self.x if self.view_width is None else min(self.view_width, grid_size[0] - self.x), 0)
+        self.height = max(grid_size[1] - self.y if self.view_height is None else min(self.view_height, grid_size[1] - self.y), 0)
+        return True
+
+    # Copy the whole view, only cells that changed are redrawn by the curses window
+    def draw(self):
+        self.fit()
+        self.curses.set_cell_section(self.x, self.y, self.world.get_region(self.world_x, self.world_y, self.width, self.height))
+
+    def move_to(self, world_x, world_y):
+        self.scroll(world_x - self.world_x, world_y - self.world_y)
+
+    # Reuse the rows and columns still in view and copy only the newly exposed strips
+    def scroll(self, dx, dy):
+        if dx == 0 and dy == 0:
+            return
+        self.world_x += dx
+        self.world_y += dy
+        if self.fit() or abs(dx) >= self.width or abs(dy) >= self.height:
+            self.draw()
+            return
+
+        self.curses.scroll_section(self.x, self.y, self.width, self.height, -dx, -dy)
+        if dy != 0:
+            row = 0 if dy < 0 else self.height - dy
+            strip = self.world.get_region(self.world_x, self.world_y + row, self.width, abs(dy))
+            self.curses.set_cell_section(self.x, self.y + row, strip)
+        if dx != 0:
+            column = 0 if dx < 0 else self.width - dx
+            strip = self.world.get_region(self.world_x + column, self.world_y, abs(dx), self.height)
+            self.curses.set_cell_section(self.x + column, self.y, strip)
+
+    # Screen cell to world cell
+    def to_world(self, x, y):
+        return x - self.x + self.world_x, y - self.y + self.world_y
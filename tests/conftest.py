@@ -0,0 +1,25 @@
+import os
+import sys
+import pytest
+
+# Tests run headless against the package in this checkout
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pyguses.util import load_config
+
+# Scaled tilesets are cached in a directory of the test session, never in the user's cache
+# (subprocesses of the tests find it through XDG_CACHE_HOME)
+@pytest.fixture(scope='session', autouse=True)
+def cache_directory(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('cache')
+    config = load_config()['CACHE']
+    saved = os.environ.get('XDG_CACHE_HOME'), config['directory']
+    os.environ['XDG_CACHE_HOME'] = str(directory)
+    config['directory'] = ''
+    yield os.path.join(str(directory), 'pyguses')
+    if saved[0] is None:
+        del os.environ['XDG_CACHE_HOME']
+    else:
+        os.environ['XDG_CACHE_HOME'] = saved[0]
+    config['directory'] = saved[1]
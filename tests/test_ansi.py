@@ -0,0 +1,170 @@
+import io
+import re
+import unicodedata
+from pyguses.grid import CellGrid
+from pyguses.ansi import AnsiRenderer
+
+cursor = re.compile(r'\x1b\[(\d+);(\d+)H')
+sgr = re.compile(r'\x1b\[[0-9;]*m')
+
+def get_renderer(width=20, height=5, color=True):
+    grid = CellGrid(width, height)
+    stream = io.StringIO()
+    renderer = AnsiRenderer(grid, stream, color)
+    renderer.render()
+    stream.seek(0)
+    stream.truncate()
+    return grid, renderer, stream
+
+def render(renderer, stream):
+    renderer.render()
+    output = stream.getvalue()
+    stream.seek(0)
+    stream.truncate()
+    return output
+
+def test_first_frame_draws_every_cell():
+    grid = CellGrid(4, 2)
+    stream = io.StringIO()
+    AnsiRenderer(grid, stream, color=False).render()
+    assert cursor.findall(stream.getvalue()) == [('1', '1'), ('2', '1')]
+    assert cursor.sub('', stream.getvalue()) == ' '*8
+
+def test_only_changed_cells_are_emitted():
+    grid, renderer, stream = get_renderer()
+    grid.put_char(3, 2, '@', 'red', 'black')
+    output = render(renderer, stream)
+    assert cursor.findall(output) == [('3', '4')]
+    assert sgr.sub('', cursor.sub('', output)) == '@'
+
+def test_unchanged_frame_emits_nothing():
+    grid, renderer, stream = get_renderer()
+    grid.put_char(3, 2, '@', 'red', 'black')
+    render(renderer, stream)
+    assert render(renderer, stream) == ''
+    # Rewriting a cell with the content already shown is not sent again
+    grid.put_char(3, 2, '@', 'red', 'black')
+    assert render(renderer, stream) == ''
+
+def test_changed_cells_are_grouped_in_runs():
+    grid, renderer, stream = get_renderer()
+    grid.put_message(2, 1, 'abc', 'red', 'black')
+    grid.put_message(10, 1, 'de', 'red', 'black')
+    output = render(renderer, stream)
+    assert cursor.findall(output) == [('2', '3'), ('2', '11')]
+    # Colours are only sent when they change
+    assert len(re.findall(r'\x1b\[0;[0-9;]*m', output)) == 1
+    assert sgr.sub('', cursor.sub('', output)) == 'abcde'
+
+def test_colors():
+    grid, renderer, stream = get_renderer()
+    grid.put_char(0, 0, 'x', 'red', 'transparent')
+    output = render(renderer, stream)
+    assert '\x1b[0;38;2;255;0;0;49m' in output
+    assert output.endswith('\x1b[0m')
+
+def test_palette_change_redraws_every_cell():
+    grid, renderer, stream = get_renderer(4, 2)
+    grid.palette.dim(0.5)
+    assert len(cursor.findall(render(renderer, stream))) == 2
+
+# Screen of a terminal after the output: a wide character fills two columns (None on the right half),
+# writing over either half of a wide character blanks the other half
+def apply(screen, output):
+    y = x = 0
+    for token in re.split(r'(\x1b\[[0-9;]*[Hm])', output):
+        position = cursor.fullmatch(token)
+        if position:
+            y, x = int(position.group(1)) - 1, int(position.group(2)) - 1
+            continue
+        if sgr.fullmatch(token):
+            continue
+        for char in token:
+            row = screen[y]
+            wide = unicodedata.east_asian_width(char) in 'WF'
+            for column in (x, x + 1) if wide else (x,):
+                if column < len(row) and row[column] is None:
+                    row[column - 1] = ' '
+                if column + 1 < len(row) and row[column + 1] is None:
+                    row[column + 1] = ' '
+            row[x] = char
+            if wide and x + 1 < len(row):
+                row[x + 1] = None
+            x += 2 if wide else 1
+    return screen
+
+def get_rows(screen):
+    return [''.join('|' if char is None else char for char in row) for row in screen]
+
+def render_screen(renderer, stream, screen):
+    output = render(renderer, stream)
+    apply(screen, output)
+    return output
+
+def get_wide_renderer():
+    grid, renderer, stream = get_renderer(6, 1, color=False)
+    screen = [[' ']*6]
+    grid.put_message(0, 0, 'abcdef')
+    render_screen(renderer, stream, screen)
+    return grid, renderer, stream, screen
+
+def test_wide_character_covers_the_next_cell():
+    grid, renderer, stream, screen = get_wide_renderer()
+    grid.put_message(0, 0, '世a')
+    output = render_screen(renderer, stream, screen)
+    # The covered 'a' is not sent, the next cell is written where the cursor was left
+    assert cursor.findall(output) == [('1', '1')]
+    assert get_rows(screen) == ['世|cdef']
+
+def test_wide_character_at_the_end_of_a_run():
+    grid, renderer, stream, screen = get_wide_renderer()
+    grid.put_char(1, 0, '世')
+    render_screen(renderer, stream, screen)
+    assert get_rows(screen) == ['a世|def']
+    # Uncovering the cell sends it again
+    grid.put_char(1, 0, 'x')
+    output = render_screen(renderer, stream, screen)
+    assert cursor.sub('', output) == 'xc'
+    assert get_rows(screen) == ['axcdef']
+
+def test_covered_cell_changes_under_a_wide_character():
+    grid, renderer, stream, screen = get_wide_renderer()
+    grid.put_char(1, 0, '世')
+    render_screen(renderer, stream, screen)
+    grid.put_char(2, 0, 'z')
+    assert render_screen(renderer, stream, screen) == ''
+    assert get_rows(screen) == ['a世|def']
+    grid.put_char(1, 0, '界')
+    render_screen(renderer, stream, screen)
+    assert get_rows(screen) == ['a界|def']
+    grid.put_char(1, 0, 'y')
+    render_screen(renderer, stream, screen)
+    assert get_rows(screen) == ['ayzdef']
+
+def test_adjacent_wide_characters():
+    grid, renderer, stream, screen = get_wide_renderer()
+    grid.put_message(0, 0, '世界世')
+    render_screen(renderer, stream, screen)
+    assert get_rows(screen) == ['世|世|ef']
+    # The uncovered wide character covers the next cell in turn
+    grid.put_char(0, 0, 'a')
+    render_screen(renderer, stream, screen)
+    assert get_rows(screen) == ['a界|def']
+    grid.put_char(1, 0, 'b')
+    render_screen(renderer, stream, screen)
+    assert get_rows(screen) == ['ab世|ef']
+
+def test_grid_dirty_flags_are_left_alone():
+    grid, renderer, stream = get_renderer()
+    grid.dirty[:] = False
+    grid.put_char(1, 1, '@')
+    render(renderer, stream)
+    assert grid.dirty[1, 1] and grid.dirty.sum() == 1
+    renderer.invalidate()
+    assert grid.dirty.sum() == 1
+
+def test_lines():
+    grid, renderer, stream = get_renderer(8, 2)
+    grid.put_message(1, 1, 'Hello')
+    assert renderer.get_lines() == [' '*8, ' Hello  ']
+    assert renderer.get_text() == ' '*8 + '\n Hello  '
@@ -0,0 +1,22 @@
+import os
+import numpy as np
+from pyguses.glyph import Tileset
+from pyguses.util import load_config
+
+def get_tileset_path():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyguses', load_config()['ASSETS']['path'])
+
+def test_tileset_disk_cache(cache_directory):
+    path = get_tileset_path()
+    # Cold: decoded from the image, then written to the session cache
+    cold = Tileset(path, 8, 12)
+    cold_masks = np.array(cold.get_masks(10, 15))
+    assert cold.source is not None
+    assert any(name.endswith('-source.npy') for name in os.listdir(cache_directory))
+
+    # Warm: colors and masks come from the cache without decoding the image
+    warm = Tileset(path, 8, 12)
+    assert warm.source is None
+    assert (warm.background, warm.foreground) == (cold.background, cold.foreground)
+    assert np.array_equal(warm.get_masks(10, 15), cold_masks)
+    assert warm.source is None
@@ -0,0 +1,74 @@
+from pyguses.loop import RunLoop
+
+# Clock moved by hand, sleeping advances it
+class FakeClock():
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+# Timestep and budget are powers of two so the float arithmetic is exact
+def get_loop(update_time=0.0, render_time=0.0, **kwargs):
+    clock = FakeClock()
+    calls = []
+    def update(timestep):
+        calls.append('update')
+        clock.now += update_time
+    def render(alpha):
+        calls.append(alpha)
+        clock.now += render_time
+    loop = RunLoop(None, update, render, timestep=0.25, fps=4, clock=clock, sleep=clock.sleep, **kwargs)
+    return loop, clock, calls
+
+def test_updates_catch_up_to_the_limit():
+    loop, clock, calls = get_loop(max_updates=5)
+    loop.step()
+    assert calls == [0.0]
+    # Stalled for 11 timesteps: 5 are run, the other 6 are dropped
+    clock.now += 2.5
+    calls.clear()
+    loop.step()
+    assert calls == ['update']*5 + [0.0]
+    assert (loop.stats.last['updates'], loop.stats.last['dropped_updates']) == (5, 6)
+    assert loop.time == 1.25 and loop.accumulator == 0
+
+def test_leftover_time_is_passed_to_render():
+    loop, clock, calls = get_loop()
+    loop.step()
+    clock.now += 0.125
+    calls.clear()
+    loop.step()
+    assert calls == ['update', 0.5]
+    assert loop.stats.last['dropped_updates'] == 0
+
+def test_slow_updates_skip_renders_up_to_max_skips():
+    loop, clock, calls = get_loop(update_time=0.5, max_skips=2)
+    loop.step()
+    rendered = []
+    for frame in range(6):
+        clock.now += 0.25
+        loop.step()
+        rendered.append(loop.stats.last['renders'])
+    # Every update overruns the budget, a frame is still shown after max_skips skipped renders
+    assert rendered == [0, 0, 1, 0, 0, 1]
+    assert [frame['skipped_renders'] for frame in list(loop.stats.history)[1:]] == [1, 1, 0, 1, 1, 0]
+
+def test_idle_time_is_slept():
+    loop, clock, calls = get_loop(render_time=0.125)
+    loop.step()
+    assert clock.sleeps == [0.125]
+    assert loop.stats.last['idle_time'] == 0.125
+    assert clock.now == 0.25
+
+    # No sleep when the frame used up its budget
+    loop.render = lambda alpha: setattr(clock, 'now', clock.now + 0.5)
+    loop.step()
+    assert clock.sleeps == [0.125]
+    assert loop.stats.last['idle_time'] == 0
@@ -0,0 +1,88 @@
+import numpy as np
+import pygame
+from pyguses.grid import CellGrid
+from pyguses.curses import Curses
+from pyguses.panel import Panel, LayerStack
+
+def get_rows(grid, cells):
+    return [''.join(grid.get_char(glyph) for glyph in row) for row in cells['glyph'].tolist()]
+
+def get_grid():
+    grid = CellGrid(10, 4)
+    for y in range(4):
+        grid.put_message(0, y, 'abcd'[y]*10, 'white', 'navy')
+    stack = LayerStack(grid)
+    panel = stack.add(Panel(2, 1, 4, 2, z=1))
+    panel.fill_cells(0, 0, 4, 2, '#', 'white', 'red')
+    return grid, stack, panel
+
+def test_panel_is_composited():
+    grid, stack, panel = get_grid()
+    assert get_rows(grid, grid.get_frame()) == ['aaaaaaaaaa', 'bb####bbbb', 'cc####cccc', 'dddddddddd']
+    # The window below is left untouched
+    assert get_rows(grid, grid.window)[1] == 'b'*10
+
+def test_hide_show_and_move():
+    grid, stack, panel = get_grid()
+    grid.get_frame()
+    panel.hide()
+    assert get_rows(grid, grid.get_frame())[1] == 'b'*10
+    panel.show()
+    panel.move(6, 2)
+    assert get_rows(grid, grid.get_frame()) == ['aaaaaaaaaa', 'bbbbbbbbbb', 'cccccc####', 'dddddd####']
+
+def test_transparency_and_z_order():
+    grid, stack, panel = get_grid()
+    top = stack.add(Panel(3, 1, 2, 1, z=2))
+    top.put_message(0, 0, 'x ', 'yellow', 'transparent')
+    frame = grid.get_frame()
+    assert get_rows(grid, frame)[1] == 'bb#x##bbbb'
+    # Transparent background shows the panel below, the blank transparent cell shows the whole cell
+    assert frame[1, 3]['background'] == panel.window[0, 1]['background']
+    assert frame[1, 4] == panel.window[0, 2]
+    top.set_z(0)
+    assert get_rows(grid, grid.get_frame())[1] == 'bb####bbbb'
+
+def test_only_damaged_cells_are_marked_dirty():
+    grid, stack, panel = get_grid()
+    grid.get_frame()
+    grid.dirty[:] = False
+    panel.put_char(0, 0, '@')
+    grid.get_frame()
+    assert np.argwhere(grid.dirty).tolist() == [[1, 2]]
+
+def test_headless_grid_recomposes_only_changes():
+    # Nothing clears the grid's dirty flags without a pygame window (e.g. ANSI or recording)
+    grid, stack, panel = get_grid()
+    grid.get_frame()
+    composed = grid.stats.cells_composed
+    panel.put_char(0, 0, '@')
+    assert get_rows(grid, grid.get_frame())[1] == 'bb@###bbbb'
+    assert grid.stats.cells_composed - composed == 1
+    grid.put_char(9, 3, 'z')
+    assert get_rows(grid, grid.get_frame())[3] == 'dddddddddz'
+    assert grid.stats.cells_composed - composed == 2
+    grid.get_frame()
+    assert grid.stats.cells_composed - composed == 2
+
+def test_scrolling_under_a_panel():
+    pygame.init()
+    pygame.display.set_mode((160, 120))
+    curses = Curses(160, 120, 'black')
+    for y in range(10):
+        curses.put_message(0, y, chr(ord('a') + y)*20)
+    stack = LayerStack(curses)
+    panel = stack.add(Panel(5, 2, 6, 3))
+    panel.fill_cells(0, 0, 6, 3, '#', 'white', 'red')
+    curses.update_window_surface()
+
+    curses.scroll_section(0, 0, 20, 10, 0, -2)
+    curses.update_window_surface()
+    rows = get_rows(curses, stack.frame)
+    assert rows[0] == 'c'*20
+    assert rows[2] == 'eeeee######eeeeeeeee'
+
+    # The scrolled pixels match a fresh render of the composed frame
+    fresh = Curses(160, 120, 'black')
+    fresh.set_cell_section(0, 0, stack.frame.copy())
+    assert (pygame.surfarray.array3d(curses.window_surface) == pygame.surfarray.array3d(fresh.get_window_surface())).all()
@@ -0,0 +1,124 @@
+import os
+import sys
+import subprocess
+import numpy as np
+import pytest
+from pyguses.grid import CellGrid
+from pyguses.record import Recorder, Player, save_snapshot, load_snapshot, read_frames, get_runs
+
+def get_chars(grid, cells=None):
+    cells = grid.window if cells is None else cells
+    return [[grid.get_char(glyph) for glyph in row] for row in cells['glyph'].tolist()]
+
+def draw_frames(grid, count):
+    rng = np.random.default_rng(0)
+    chars = ['a', '#', '@', '世', 'ж', '☃']
+    for frame in range(count):
+        for _ in range(5):
+            grid.put_char(int(rng.integers(grid.win_width)), int(rng.integers(grid.win_height)), chars[int(rng.integers(len(chars)))], 'red', 'navy')
+        if frame == count//2:
+            grid.palette.dim(0.5)
+        yield frame
+
+def record(grid, path, count):
+    states = []
+    with Recorder(grid, path, None) as recorder:
+        for frame in draw_frames(grid, count):
+            recorder.capture(frame/60)
+            states.append((get_chars(grid), grid.window[['foreground', 'background']].copy(), grid.palette.table.copy()))
+    return states
+
+def assert_state(grid, state):
+    chars, colors, palette = state
+    assert get_chars(grid) == chars
+    assert (grid.window[['foreground', 'background']] == colors).all()
+    assert (grid.palette.table == palette).all()
+
+def test_runs_merge_one_cell_gaps():
+    changed = np.array([1, 0, 1, 0, 0, 1, 1, 0], dtype=bool)
+    assert get_runs(changed).tolist() == [[0, 3], [5, 2]]
+    assert get_runs(np.zeros(4, dtype=bool)).tolist() == []
+
+def test_snapshot_round_trip(tmp_path):
+    grid = CellGrid(12, 4)
+    grid.put_message(0, 1, 'map 世界 ☃', 'yellow', 'navy')
+    grid.palette.set_color('red', (10, 20, 30, 255))
+    path = str(tmp_path/'screen.snap')
+    save_snapshot(grid, path)
+
+    cells, palette = load_snapshot(path)
+    assert isinstance(cells, np.memmap)
+    assert (cells == grid.window).all()
+    assert (palette == grid.palette.table).all()
+
+# Fallback glyph indices depend on the order characters were first used in a process
+def test_snapshot_renumbers_fallback_glyphs(tmp_path):
+    grid = CellGrid(12, 2)
+    grid.put_message(0, 0, 'ok 世界 ☃')
+    path = str(tmp_path/'screen.snap')
+    save_snapshot(grid, path)
+
+    script = ('import sys; from pyguses.grid import CellGrid; from pyguses.record import load_snapshot\n'
+              'grid = CellGrid(1, 1); grid.put_message(0, 0, "Ω漢字")\n'
+              'cells, palette = load_snapshot(sys.argv[1])\n'
+              'print("".join(grid.get_char(glyph) for glyph in cells["glyph"][0].tolist()))')
+    env = dict(os.environ, PYTHONPATH=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    output = subprocess.check_output([sys.executable, '-c', script, path], env=env, stderr=subprocess.DEVNULL)
+    assert output.decode('utf-8').splitlines()[-1] == 'ok 世界 ☃'.ljust(12)
+
+def test_recording_replays_and_seeks_backwards(tmp_path):
+    grid = CellGrid(16, 6)
+    path = str(tmp_path/'session.rec')
+    states = record(grid, path, 20)
+
+    # Later frames hold only the changed cells
+    header, frames = read_frames(path)
+    assert len(frames) == 20
+    assert len(frames[0][4]) == grid.window.size
+    assert all(len(frame[4]) < grid.window.size for frame in frames[1:])
+
+    player = Player(path, CellGrid(16, 6))
+    for index in [0, 7, 19, 3, 12, 0]:
+        player.seek(index)
+        assert_state(player.grid, states[index])
+
+def test_playback_follows_recorded_time(tmp_path):
+    grid = CellGrid(8, 2)
+    path = str(tmp_path/'session.rec')
+    states = record(grid, path, 10)
+    player = Player(path, CellGrid(8, 2))
+    assert player.update(0.0)
+    assert player.index == 0
+    assert not player.update(0.001)
+    assert player.update(4.5/60)
+    assert player.index == 4
+    assert_state(player.grid, states[4])
+    player.update(1.0)
+    assert player.is_finished()
+
+def test_truncated_last_frame_is_dropped(tmp_path):
+    grid = CellGrid(8, 3)
+    path = str(tmp_path/'session.rec')
+    states = record(grid, path, 3)
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - 2)
+
+    player = Player(path, CellGrid(8, 3))
+    assert len(player) == 2
+    player.seek(10)
+    assert_state(player.grid, states[1])
+
+def test_capture_rate():
+    grid = CellGrid(4, 1)
+    recorder = Recorder(grid, os.devnull, fps=60)
+    assert recorder.capture(0)
+    assert not recorder.capture(0.005)
+    assert recorder.capture(1/60 - 0.001)
+    assert recorder.capture(2/60)
+    recorder.close()
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path/'other.bin'
+    path.write_bytes(b'not a recording at all, no no no')
+    with pytest.raises(ValueError):
+        read_frames(str(path))
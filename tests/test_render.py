@@ -0,0 +1,110 @@
+import numpy as np
+import pygame
+from pyguses.curses import Curses
+
+def get_curses(blit_threshold=None):
+    pygame.init()
+    pygame.display.set_mode((320, 240))
+    curses = Curses(160, 120, 'black')
+    if blit_threshold is not None:
+        curses.blit_threshold = blit_threshold
+    return curses
+
+def draw_scene(curses):
+    curses.put_message(0, 0, 'Hello World! ☺♥ abc', 'red', 'blue')
+    curses.put_message(2, 3, 'wrap wrap wrap wrap', 'yellow', 'transparent')
+    curses.put_message(0, 6, 'Ωé世界 #@', 'lime', 'navy')
+    curses.fill_cells(12, 7, 5, 2, '=', 'white', 'red')
+
+def get_pixels(surface):
+    return np.dstack([pygame.surfarray.array3d(surface), pygame.surfarray.array_alpha(surface)])
+
+# Window as the original per-cell code drew it: tileset (or fallback) image tinted through get_colored_image
+def get_reference(curses, light=None):
+    pixels = np.zeros([curses.win_width*curses.cell_width, curses.win_height*curses.cell_height, 4], dtype=np.uint8)
+    for y in range(curses.win_height):
+        for x in range(curses.win_width):
+            cell = curses.get_cell(x, y)
+            image = curses.get_colored_image(curses.get_image_by_char(cell['char']), cell['foreground'], cell['background'])
+            block = get_pixels(image)
+            if light is not None:
+                block[..., :3] = np.clip(block[..., :3]*np.float32(light[y, x]), 0, 255).astype(np.uint8)
+            pixels[x*curses.cell_width:(x + 1)*curses.cell_width, y*curses.cell_height:(y + 1)*curses.cell_height] = block
+    return pixels
+
+def assert_matches_reference(curses, light=None):
+    assert (get_pixels(curses.get_window_surface()) == get_reference(curses, light)).all()
+
+def test_vectorized_and_blit_paths_match_the_reference():
+    vectorized = get_curses(blit_threshold=0)
+    blitted = get_curses(blit_threshold=vectorized.window.size)
+    for curses in (vectorized, blitted):
+        draw_scene(curses)
+        assert_matches_reference(curses)
+    assert (get_pixels(vectorized.window_surface) == get_pixels(blitted.window_surface)).all()
+    # Only the blit path tints glyphs through the cache
+    assert len(vectorized.glyph_cache) == 0 and len(blitted.glyph_cache) > 0
+
+    # Incremental updates of a few cells
+    for curses in (vectorized, blitted):
+        curses.put_message(3, 0, 'p!', 'fuchsia', 'transparent')
+        curses.put_char(19, 9, '世', 'aqua', 'maroon')
+        assert_matches_reference(curses)
+
+def test_dirty_cells_merge_into_row_runs():
+    curses = get_curses()
+    draw_scene(curses)
+    curses.update_window_surface()
+    curses.put_message(2, 1, 'abc')
+    curses.put_char(10, 1, 'd')
+    curses.put_char(0, 4, 'e')
+    width, height = curses.cell_width, curses.cell_height
+    assert curses.update_window_surface() == [pygame.Rect(2*width, height, 3*width, height),
+                                              pygame.Rect(10*width, height, width, height),
+                                              pygame.Rect(0, 4*height, width, height)]
+    # Cells rewritten with what is already drawn are not redrawn
+    curses.put_message(2, 1, 'abc')
+    assert curses.update_window_surface() == []
+    assert curses.stats.last['cells_redrawn'] == 0
+
+def test_scroll_reuses_pixels():
+    curses = get_curses()
+    draw_scene(curses)
+    curses.update_window_surface()
+    curses.scroll_section(0, 0, 20, 10, -3, -2)
+    curses.fill_cells(17, 0, 3, 10, '.', 'gray', 'black')
+    curses.fill_cells(0, 8, 17, 2, '.', 'gray', 'black')
+    rects = curses.update_window_surface()
+    # Only the exposed strips are redrawn, the rest is moved on the surface
+    assert curses.stats.last['cells_redrawn'] == 3*10 + 17*2
+    assert pygame.Rect(0, 0, curses.win_width*curses.cell_width, curses.win_height*curses.cell_height) in rects
+    assert_matches_reference(curses)
+
+def test_light_map():
+    curses = get_curses()
+    draw_scene(curses)
+    curses.update_window_surface()
+    light = np.linspace(0, 1.5, curses.window.size, dtype=np.float32).reshape(curses.window.shape)
+    curses.set_light(light)
+    assert_matches_reference(curses, light)
+    # A light change alone redraws the cell
+    light[4, 4] = 0.25
+    curses.set_light(light)
+    assert_matches_reference(curses, light)
+    curses.disable_light()
+    assert_matches_reference(curses)
+
+def test_palette_swap():
+    curses = get_curses()
+    draw_scene(curses)
+    curses.update_window_surface()
+    curses.palette.set_color('red', (10, 200, 30, 255))
+    curses.palette.dim(0.5)
+    assert_matches_reference(curses)
+
+    fresh = get_curses()
+    fresh.palette.set_table(curses.palette.table)
+    draw_scene(fresh)
+    assert (get_pixels(fresh.get_window_surface()) == get_pixels(curses.window_surface)).all()
+    curses.palette.reset()
+    assert_matches_reference(curses)
@@ -0,0 +1,113 @@
+import pygame
+import pytest
+from pyguses.curses import Curses, Animator
+from pyguses.grid import CellGrid
+from pyguses.record import Recorder, Player, read_frames
+from pyguses.render import ThreadedRenderer
+from pyguses.world import WorldMap, Viewport
+
+def get_curses(width=160, height=120):
+    pygame.init()
+    pygame.display.set_mode((320, 240))
+    curses = Curses(width, height, 'black')
+    curses.put_message(0, 0, 'Hello 世界', 'yellow', 'navy')
+    curses.put_char(10, 5, '@', 'red', 'black')
+    return curses
+
+def get_pixels(surface):
+    return pygame.surfarray.array3d(surface), pygame.surfarray.array_alpha(surface)
+
+def assert_same_pixels(a, b):
+    assert all((x == y).all() for x, y in zip(get_pixels(a), get_pixels(b)))
+
+def test_resize_matches_a_window_built_at_the_new_size():
+    curses = get_curses()
+    curses.get_window_surface()
+    curses.resize(16, 24, 320, 240)
+    assert curses.window.shape == (10, 20)
+
+    fresh = Curses(160, 120, 'black')
+    fresh.resize(16, 24, 320, 240)
+    fresh.put_message(0, 0, 'Hello 世界', 'yellow', 'navy')
+    fresh.put_char(10, 5, '@', 'red', 'black')
+    assert_same_pixels(curses.get_window_surface(), fresh.get_window_surface())
+
+def test_resize_keeps_the_cells_that_fit():
+    curses = get_curses()
+    curses.resize(8, 12, 96, 48)
+    assert curses.window.shape == (4, 12)
+    assert curses.get_cell(6, 0)['char'] == '世'
+
+def test_invalid_resize_changes_nothing():
+    curses = get_curses()
+    before = (curses.cell_width, curses.cell_height, curses.screen_width, curses.screen_height, curses.window.shape)
+    with pytest.raises(ValueError):
+        curses.resize(7, 12, 160, 120)
+    with pytest.raises(ValueError):
+        curses.resize(8, 7, 160, 120)
+    assert (curses.cell_width, curses.cell_height, curses.screen_width, curses.screen_height, curses.window.shape) == before
+
+def test_threaded_renderer_follows_resize():
+    curses = get_curses()
+    with ThreadedRenderer(curses) as threaded:
+        curses.resize(16, 24, 320, 240)
+        threaded.publish()
+        assert threaded.wait(5)
+        assert threaded.flip()
+    assert threaded.surface.get_size() == (320, 240)
+    assert_same_pixels(threaded.surface, curses.get_window_surface())
+
+def test_recording_keeps_its_size(tmp_path):
+    curses = get_curses()
+    path = str(tmp_path / 'resize.rec')
+    with Recorder(curses, path, None) as recorder:
+        recorder.capture(0)
+        # Shrinking pads the recording with blank cells, growing crops the new cells
+        curses.resize(16, 24, 160, 120)
+        recorder.capture(1)
+        curses.resize(8, 12, 320, 240)
+        curses.put_char(39, 19, '#')
+        curses.put_char(1, 0, 'E')
+        recorder.capture(2)
+    (width, height, tile_count, fps), frames = read_frames(path)
+    assert (width, height) == (20, 10)
+
+    grid = CellGrid(20, 10)
+    player = Player(path, grid)
+    player.seek(1)
+    assert grid.get_char(grid.window[5, 10]['glyph']) == ' '
+    assert grid.get_char(grid.window[0, 6]['glyph']) == '世'
+    player.seek(2)
+    assert ''.join(grid.get_char(glyph) for glyph in grid.window[0, :10]['glyph'].tolist()) == 'HEllo 世界'.ljust(10)
+    # Only the changed cell inside the recorded size is written
+    assert len(frames[2][4]) == 1
+
+def test_animator_drops_cells_outside_the_window():
+    curses = get_curses()
+    animator = Animator(curses, clock=lambda: 0)
+    animator.add_cycle(2, 2, [{'char' : 'a', 'foreground' : 'white', 'background' : 'black'}, {'char' : 'b', 'foreground' : 'white', 'background' : 'black'}], 100)
+    animator.add_flicker(15, 8)
+    curses.resize(16, 24, 160, 120)
+    assert animator.update(0.1) == 1
+    assert len(animator) == 1
+    assert curses.get_cell(2, 2)['char'] == 'b'
+    animator.remove(2, 2)
+    assert len(animator) == 0
+
+def test_viewport_follows_the_window():
+    curses = get_curses()
+    world = WorldMap(100, 100)
+    for y in range(100):
+        world.put_char(0, y, str(y % 10))
+    full = Viewport(world, curses)
+    part = Viewport(world, curses, x=2, y=1, width=8, height=20)
+    curses.resize(16, 24, 160, 120)
+    full.scroll(0, 3)
+    assert (full.width, full.height) == (10, 5)
+    assert [curses.get_cell(0, y)['char'] for y in range(5)] == ['3', '4', '5', '6', '7']
+    part.move_to(-2, 0)
+    assert (part.width, part.height) == (8, 4)
+    curses.resize(8, 12, 320, 240)
+    full.draw()
+    assert (full.width, full.height) == (40, 20)
+    assert curses.get_cell(0, 19)['char'] == '2'
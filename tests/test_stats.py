@@ -0,0 +1,32 @@
+from pyguses.glyph import GlyphCache
+from pyguses.stats import FrameStats
+
+def test_cache_counters_per_frame():
+    stats = FrameStats()
+    cache = GlyphCache(capacity=2)
+    # First frame: everything since the cache was created
+    for key in 'abc':
+        if cache.get(key) is None:
+            cache.put(key, key)
+    cache.get('c')
+    frame = stats.end_frame(cache)
+    assert (frame['cache_hits'], frame['cache_misses'], frame['cache_evictions']) == (1, 3, 1)
+    assert frame['cache_size'] == 2
+
+    # Later frames: only the difference since the previous frame
+    cache.get('b')
+    cache.get('a')
+    frame = stats.end_frame(cache)
+    assert (frame['cache_hits'], frame['cache_misses'], frame['cache_evictions']) == (1, 1, 0)
+    frame = stats.end_frame(cache)
+    assert (frame['cache_hits'], frame['cache_misses'], frame['cache_evictions']) == (0, 0, 0)
+
+def test_counters_reset_every_frame():
+    stats = FrameStats()
+    stats.cells_written += 5
+    hooked = []
+    stats.add_hook(hooked.append)
+    assert stats.end_frame()['cells_written'] == 5
+    assert stats.end_frame()['cells_written'] == 0
+    assert [frame['frame'] for frame in hooked] == [0, 1]
+    assert 'cache_hits' not in hooked[0]
@@ -0,0 +1,59 @@
+import os
+import sys
+import stat
+import subprocess
+import numpy as np
+import pytest
+from pyguses.glyph import char_index
+from pyguses.world import WorldMap
+
+def get_text(world, x, y, width):
+    return ''.join(char_index.get_char(glyph) for glyph in world.get_region(x, y, width, 1)['glyph'][0].tolist())
+
+def test_chunks_are_allocated_on_write():
+    world = WorldMap(1000, 1000, chunk_size=16)
+    assert get_text(world, 30, 40, 3) == '   '
+    world.put_char(31, 40, '#')
+    world.fill(-5, 0, 10, 2, '.')
+    assert sorted(world.chunks) == [(0, 0), (1, 2)]
+    assert get_text(world, 30, 40, 3) == ' # '
+    assert get_text(world, -2, 1, 4) == '  ..'
+
+def test_saved_map_keeps_its_characters(tmp_path):
+    path = str(tmp_path/'level.npy')
+    world = WorldMap(40, 4, path=path)
+    world.put_char(0, 0, 'ok')
+    for x, char in enumerate('世界☃'):
+        world.put_char(x + 2, 1, char)
+    world.flush()
+    del world
+
+    # A fresh process numbers other characters first, the map is renumbered on load
+    script = ('import sys; from pyguses.glyph import char_index; from pyguses.world import WorldMap\n'
+              'char_index.get_glyph("Ω"); char_index.get_glyph("漢")\n'
+              'world = WorldMap(40, 4, path=sys.argv[1])\n'
+              'print("".join(char_index.get_char(glyph) for glyph in world.get_region(0, 1, 6, 1)["glyph"][0].tolist()))')
+    env = dict(os.environ, PYTHONPATH=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    output = subprocess.check_output([sys.executable, '-c', script, path], env=env, stderr=subprocess.DEVNULL)
+    assert output.decode('utf-8').splitlines()[-1] == '  世界☃ '
+
+def test_existing_map_opens_read_only(tmp_path):
+    path = str(tmp_path/'level.npy')
+    WorldMap(8, 8, path=path).flush()
+    os.chmod(path, stat.S_IRUSR)
+    world = WorldMap(8, 8, path=path)
+    assert not world.cells.flags.writeable
+    with pytest.raises(ValueError):
+        world.put_char(0, 0, '#')
+    os.chmod(path, stat.S_IRUSR | stat.S_IWUSR)
+
+    world = WorldMap(8, 8, path=path, writable=True)
+    world.put_char(1, 1, '#')
+    world.flush()
+    assert get_text(WorldMap(8, 8, path=path), 0, 1, 3) == ' # '
+
+def test_mismatched_file_is_rejected(tmp_path):
+    path = str(tmp_path/'level.npy')
+    WorldMap(8, 8, path=path).flush()
+    with pytest.raises(ValueError):
+        WorldMap(8, 9, path=path)